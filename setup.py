@@ -17,7 +17,7 @@ setup(
     author_email='aroth1338@gmail.com',
     packages=['viper', 'viper.ColorWheel', 'viper.icons', "viper.main_plotting", "viper.plot_annotations", "viper.stylesheets"],
     #dependencies
-    install_requires=['numpy', 'matplotlib >= 3.5.0', 'pillow'],
+    install_requires=['numpy', 'matplotlib >= 3.6.0', 'pillow', 'scipy'],
     version=version,
     license='MIT',
     description='Supplemental package to assist with data visualization in Python.',
@@ -1,114 +1,125 @@
-import colorsys
-import matplotlib.colors as mc
-from matplotlib.colors import LinearSegmentedColormap
 import numpy as np
 
+from .color_math import hex_to_rgb_array, rgb_to_hex_array, rgb_to_hls_array, hls_to_rgb_array, lighten_array, _blend_rgb
+from .colormaps import map_values
+
 class Color():
+    """
+    A single color. Behaves like its hex code when printed or compared, and like a normalized
+    (r, g, b) tuple when iterated, so it can be passed straight to matplotlib.
+    RGB and HLS values are computed on first use and kept, and darker(), lighter(), * and + return
+    new Color objects, so chained operations never go back through the hex string.
+    """
+    __slots__ = ("hex", "_rgb", "_hls")
 
     def __init__(self, color_hex):
         """Assumes input is a hex code"""
-        self.color = color_hex
-        self.hex = color_hex
-        self.rgb = self.__hex_to_rgb(color_hex)
-        
-        #TODO Add other representations?
+        self.hex = str(color_hex)
+        self._rgb = None
+        self._hls = None
+
+    @classmethod
+    def _from_rgb(cls, rgb):
+        """
+        Creates a Color from integer RGB values from 0-255 without parsing its hex code again.
+        """
+        rgb = np.clip(np.trunc(rgb), 0, 255)
+        color = cls(rgb_to_hex_array([rgb], normalized = False)[0])
+        color._rgb = tuple(float(x) for x in rgb / 255)
+        return color
+
+    @property
+    def color(self):
+        return self.hex
+
+    @property
+    def rgb(self):
+        """Integer RGB values from 0-255"""
+        return tuple(round(x * 255) for x in self.normalized_rgb)
+
+    @property
+    def normalized_rgb(self):
+        """Float RGB values from 0-1"""
+        if self._rgb is None:
+            self._rgb = tuple(float(x) for x in hex_to_rgb_array(self.hex, normalize = True)[0])
+        return self._rgb
+
+    @property
+    def hls(self):
+        """Float HLS values, as returned by colorsys.rgb_to_hls"""
+        if self._hls is None:
+            self._hls = tuple(float(x) for x in rgb_to_hls_array(self.normalized_rgb))
+        return self._hls
 
-        
     @property
     def dark(self):
-        return self.__lighten_color(self.color, 1.3)
-    
+        return self.__lighten_color(1.3)
+
     @property
     def light(self):
-        return self.__lighten_color(self.color, .7)
-    
+        return self.__lighten_color(.7)
+
     def darker(self, amount = .2):
-        return self.__lighten_color(self.color, 1+amount)
-    
+        return self.__lighten_color(1+amount)
+
     def lighter(self, amount = .2):
-        return self.__lighten_color(self.color, 1-amount)
+        return self.__lighten_color(1-amount)
+
+    def __lighten_color(self, amount = 1):
 
-    def __lighten_color(self, color, amount = 1):
-        
         if amount <= 0:
-            return "#FFFFFF"
+            return Color("#FFFFFF")
         elif amount >= 2:
-            return "#000000"
-        
-        c = colorsys.rgb_to_hls(*mc.to_rgb(color))
-        rgb = colorsys.hls_to_rgb(c[0], 1 - amount * (1 - c[1]), c[2])
-        
-        return self.__rgb_to_hex(rgb)
-        
-    def __hex_to_rgb(self, hex_code, normalize = False):
-        """
-        Input: Hex String
-        Output: integer RGB values
-        """
-        hex_code = hex_code.lstrip("#")
-        RGB_vals = tuple(int(hex_code[i:i+2], 16) for i in (0, 2, 4))
-        if normalize: 
-            RGB_vals = (RGB_vals[0] / 255, RGB_vals[1] / 255, RGB_vals[2] / 255)
-
-        return RGB_vals
-    
-    def __rgb_to_hex(self, rgb):
-        """
-        Input: rgb tuple, ex: (.2, .8, .2) or (40, 185, 40)
-        Output: Hex Representation of color
-        """
-        if rgb[0] < 1 or rgb[1] < 1 or rgb[2] < 1:
-            int_rgb = (rgb[0] * 255, rgb[1] * 255, rgb[2] * 255)
-            int_rgb = [int(x) for x in int_rgb]
-            int_rgb = tuple(int_rgb)
-        else: #really make sure they are ints
-            int_rgb = [int(x) for x in int_rgb]
-            int_rgb = tuple(int_rgb)
-
-        return '#%02x%02x%02x' % int_rgb
-    
-    def __blend(self, color1, color2, ratio = .5):
+            return Color("#000000")
+
+        h, l, s = self.hls
+        return Color._from_rgb(hls_to_rgb_array([h, 1 - amount * (1 - l), s]) * 255)
+
+    def __blend(self, other, ratio = .5):
         """
-        Blends to given colors. Input must be hex code
-        Returns blended color in hex code
+        Blends with another Color or hex code. Returns the blended Color.
         """
-        colorRGBA1 = self.__hex_to_rgb(color1)
-        colorRGBA2 = self.__hex_to_rgb(color2)
-        
-        amount = int(255 * ratio)
-        
-        red   = (colorRGBA1[0] * (255 - amount) + colorRGBA2[0] * amount) / 255
-        green = (colorRGBA1[1] * (255 - amount) + colorRGBA2[1] * amount) / 255
-        blue  = (colorRGBA1[2] * (255 - amount) + colorRGBA2[2] * amount) / 255
-        
-        result = self.__rgb_to_hex((int(red), int(green), int(blue)))
-
-        return result 
-    
-    def __mul__(self, other):    
-        return self.__lighten_color(self.color, other)
-    
+        if not isinstance(other, Color):
+            other = Color(other)
+        return Color._from_rgb(_blend_rgb(self.rgb, other.rgb, int(255 * ratio)))
+
+    def __mul__(self, other):
+        return self.__lighten_color(other)
+
     def __truediv__(self, other):
-        
+
         if isinstance(other, int) or isinstance(other, float):
             n = int(other)
-            return [self.__lighten_color(self.color, amount = (x+1)/int(n/2+1)) for x in range(n)]
+            return [Color(x) for x in lighten_array(self.hex, (np.arange(n) + 1) / int(n/2+1))]
         elif isinstance(other, Color):
-            cmap_colors = [self.__hex_to_rgb(x, normalize = True) for x in [self.color, other.color]]
-
-            cm = LinearSegmentedColormap.from_list(
-                    "Custom", cmap_colors, N=100)
-            
-            return cm(np.linspace(0, 1, 10))
+            return map_values(np.linspace(0, 1, 10), [self.hex, other.hex], N = 100)
 
     def __add__(self, other):
+        if isinstance(other, (str, Color)):
+            return self.__blend(other, ratio = .5)
+
+    #sequence of normalized RGB values, the form matplotlib accepts for non string colors
+    def __iter__(self):
+        return iter(self.normalized_rgb)
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, index):
+        return self.normalized_rgb[index]
+
+    def __eq__(self, other):
+        if isinstance(other, Color):
+            return self.hex.lower() == other.hex.lower()
         if isinstance(other, str):
-            return self.__blend(self.color, other, ratio = .5)
-        elif isinstance(other, Color):
-            return self.__blend(self.color, other.color, ratio = .5)
-        
+            return self.hex.lower() == other.lower()
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.hex.lower())
+
     def __repr__(self):
-        return self.color
-    
+        return self.hex
+
     def __str__(self):
-        return self.color
\ No newline at end of file
+        return self.hex
@@ -1,16 +1,100 @@
-import matplotlib.colors as mc
 import colorsys
 import matplotlib.pyplot as plt        
 import numpy as np
-from matplotlib.colors import LinearSegmentedColormap
 import importlib
 from functools import cached_property
+from collections import namedtuple
+from scipy.spatial import cKDTree
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PatchCollection, PathCollection
+from matplotlib.figure import Figure as MplFigure
+from matplotlib.font_manager import FontProperties
+from matplotlib.patches import Rectangle
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D
+import io
 import os
 
 Color = importlib.import_module(".Color", "viper.ColorWheel").Color
+from .colormaps import cached_cmap
+from .accessibility import palette_accessibility, simulate_cvd, label_color
+from .color_math import _is_hex, hex_to_rgb_array, rgb_to_hex_array, lighten_array, blend_array, to_rgb_array, rgb_to_hls_array, rgb_to_oklab_array
 
 head, tail = os.path.split(os.path.dirname(os.path.abspath(__file__)))
 
+color_list_path = os.path.join(head, "ColorWheel", "color_list.txt")
+
+#parsed color files, absolute path -> (modification time, {name: hex code})
+_color_tables = {}
+
+#palette tables shared by unmodified wheels built from the same files, keyed like ColorWheel._source
+_shared_palettes = {}
+
+#hex -> names reverse indexes shared by unmodified wheels built from the same files, keyed like ColorWheel._source
+_shared_hex_indexes = {}
+
+#wheel returned by ColorWheel.shared()
+_shared_wheel = None
+
+def _read_color_file(path):
+    """
+    Returns the {name: hex code} table of a color file in the color_list.txt format.
+    Each file is parsed once and only re-read after its modification time changes.
+    Later definitions of a name replace earlier ones but keep the position of the first.
+    """
+    path  = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime_ns
+
+    cached = _color_tables.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    table = {}
+    with open(path, "r") as file:
+        for line in file.readlines():
+            clean = line.strip()
+            var_name = clean.split("=")
+
+            #Not a line break or a comment
+            if var_name[0] !=  "" and var_name[0][0] != "#":
+                table[var_name[0].strip()] = var_name[1].strip()
+
+    _color_tables[path] = (mtime, table)
+    return table
+
+def _normalize_hex(color):
+    """
+    Returns the given color as a lower case "#rrggbb" string, or None if it is not a color code.
+    Accepts "#RGB" and "#RRGGBB" hex strings (any case) and RGB tuples, either integers from 0-255
+    or floats from 0-1.
+    """
+    if isinstance(color, str):
+        hex_code = color.strip().lower()
+        if not hex_code.startswith("#"):
+            return None
+        hex_code = hex_code[1:]
+        if len(hex_code) == 3:
+            hex_code = "".join(2 * x for x in hex_code)
+        if len(hex_code) != 6 or not _is_hex(hex_code):
+            return None
+        return "#" + hex_code
+
+    try:
+        rgb = tuple(color)[:3]
+    except TypeError:
+        return None
+    if len(rgb) != 3:
+        return None
+    if not all(isinstance(x, (int, np.integer)) for x in rgb):
+        rgb = tuple(round(float(x) * 255) for x in rgb)
+    return '#%02x%02x%02x' % tuple(min(max(int(x), 0), 255) for x in rgb)
+
+#Precomputed coordinates of every wheel color, rows in wheel order
+_Palette = namedtuple("_Palette", ["names", "hex", "hls", "oklab", "tree", "distances"])
+
+#colors skipped by find_contrast_color
+_neutral_colors = ["white", "black", "dark_grey", "light_grey", "grey"]
+
 class _colorwheeldotdict(dict):
     """dot.notation access to dictionary attributes"""
     __setattr__ = dict.__setitem__
@@ -18,40 +102,229 @@ class _colorwheeldotdict(dict):
     colors_used = []
     
     def __getattr__(self, key):
+        #private and special names are never colors, so hasattr/copy/pickle probes see a normal AttributeError
+        if key.startswith("_"):
+            raise AttributeError(key)
         if key not in self.keys():
             raise ValueError(f"No such color or method \"{key}\"")
         else:
             if key not in self.colors_used: self.colors_used.append(key)
             return self[f"{key}"]
     
+class _colorobjectdict(_colorwheeldotdict):
+    """
+    Maps wheel names to Color objects. Entries hold the hex code until they are first accessed,
+    so only the colors that are actually used get a Color object.
+    """
+    def __init__(self, wheel):
+        dict.__init__(self, wheel)
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if not isinstance(value, Color):
+            value = Color(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default = None):
+        return self[key] if key in self else default
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+def _rebuild_wheel(cls, colors, source):
+    """
+    Recreates a pickled or copied ColorWheel without reading any color files.
+    """
+    wheel = cls.__new__(cls)
+    dict.update(wheel, colors)
+    wheel.__dict__["_source"] = source
+    wheel._load_hex_index()
+    return wheel
+
 class ColorWheel(_colorwheeldotdict):
     """
     ColorWheel object to store common colors used by the CashabackLab
     Can Access colors as a dictionary key or as a class attribute
     """
-    def __init__(self):
+    def __init__(self, color_files = None):
         """
         Only define colors with Hex codes in color_list.txt
         For any attributes that are not hex code colors, create a function with the @property decorator
         For Examples see color_list
+
+        color_files: optional list of paths to extra color files (same format as color_list.txt) merged
+            on top of the base list. Colors in later files replace colors with the same name.
+
+        Color files are parsed once per process (and again only if they change on disk), so creating
+        a wheel just copies the parsed tables. The reverse hex index is shared until the wheel changes. Use ColorWheel.shared() to reuse a single wheel.
+        """
+        paths = [color_list_path] + [os.path.abspath(x) for x in (color_files or [])]
+
+        source = []
+        for path in paths:
+            dict.update(self, _read_color_file(path))
+            source.append((path, _color_tables[path][0]))
+        self.__dict__["_source"] = tuple(source)
+
+        self._load_hex_index()
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns a process-wide ColorWheel built from color_list.txt, creating it on first use.
+        Changes made to the shared wheel are seen by every caller.
+        """
+        global _shared_wheel
+        if _shared_wheel is None:
+            _shared_wheel = cls()
+        return _shared_wheel
+
+    def merge_file(self, path):
+        """
+        Adds the colors of a color file (same format as color_list.txt) to this wheel.
+        Colors with names already in the wheel are replaced.
+        """
+        for name, hexcode in _read_color_file(path).items():
+            self[name] = hexcode
+
+    def _load_hex_index(self):
+        """
+        Sets up the normalized hex -> names reverse index used by get_name, get_names and in_wheel.
+        Names sharing a color are listed in wheel order. Unmodified wheels built from the same files
+        share one index, which is copied before the first change.
+        """
+        hex_index = _shared_hex_indexes.get(self._source) if self._source is not None else None
+        if hex_index is None:
+            hex_index = {}
+            for name, hexcode in self.items():
+                key = _normalize_hex(hexcode)
+                if key is not None:
+                    hex_index.setdefault(key, []).append(name)
+            if self._source is not None:
+                _shared_hex_indexes[self._source] = hex_index
+        self.__dict__["_hex_index"] = hex_index
+        self.__dict__["_hex_index_shared"] = self._source is not None
+
+    def _own_hex_index(self):
         """
+        Returns the reverse index for changing, copying it first if it is shared with other wheels.
+        """
+        if self._hex_index_shared:
+            self.__dict__["_hex_index"] = {key: list(names) for key, names in self._hex_index.items()}
+            self.__dict__["_hex_index_shared"] = False
+        return self._hex_index
 
-        with open(os.path.join(head, "ColorWheel", "color_list.txt"), "r") as file:
-            for line in file.readlines():
-                clean = line.strip()
-                var_name = clean.split("=")
+    def _changed(self):
+        """
+        Drops everything derived from the wheel contents. The wheel no longer matches its color files,
+        so it stops using the tables shared with other wheels.
+        """
+        self.__dict__.pop("_palette_table", None)
+        self.__dict__.pop("object_list", None)
+        self.__dict__["_source"] = None
+
+    def __setitem__(self, name, hexcode):
+        self._changed()
+        if name in self:
+            self._unindex(name)
+        dict.__setitem__(self, name, hexcode)
+
+        key = _normalize_hex(hexcode)
+        if key is not None:
+            names = self._own_hex_index().setdefault(key, [])
+            names.append(name)
+            #keep aliases in wheel order when an existing name changes color
+            if len(names) > 1:
+                order = {x: i for i, x in enumerate(self.keys())}
+                names.sort(key = order.get)
+
+    def __delitem__(self, name):
+        self._changed()
+        self._unindex(name)
+        dict.__delitem__(self, name)
+
+    def _unindex(self, name):
+        key = _normalize_hex(self[name])
+        if key is not None:
+            hex_index = self._own_hex_index()
+            names = hex_index[key]
+            names.remove(name)
+            if not names:
+                del hex_index[key]
+
+    __setattr__ = __setitem__
+    __delattr__ = __delitem__
+
+    #the inherited dict mutators skip __setitem__/__delitem__, route them through it to keep the index in sync
+    def update(self, *args, **kwargs):
+        for name, hexcode in dict(*args, **kwargs).items():
+            self[name] = hexcode
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def setdefault(self, name, hexcode = None):
+        if name not in self:
+            self[name] = hexcode
+        return dict.__getitem__(self, name)
+
+    def pop(self, name, *default):
+        if name not in self:
+            return dict.pop(self, name, *default)
+        hexcode = dict.__getitem__(self, name)
+        del self[name]
+        return hexcode
+
+    def popitem(self):
+        if not self:
+            raise KeyError("popitem(): ColorWheel is empty")
+        name = next(reversed(self.keys()))
+        return name, self.pop(name)
+
+    def clear(self):
+        self._changed()
+        dict.clear(self)
+        self.__dict__["_hex_index"] = {}
+        self.__dict__["_hex_index_shared"] = False
+
+    def __reduce__(self):
+        #the default dict pickling sets items before __dict__ is restored, which needs the hex index
+        return (_rebuild_wheel, (type(self), dict(self), self._source))
 
-                #Not a line break or a comment
-                if var_name[0] !=  "" and var_name[0][0] != "#":
-                    self[var_name[0].strip()] = var_name[1].strip()
+    @property
+    def _palette(self):
+        """
+        HLS and OKLab coordinates of every wheel color, a KD-tree over the OKLab coordinates and the
+        matrix of pairwise OKLab distances.
+        Built on first use and rebuilt after the wheel changes.
+        """
+        palette = self.__dict__.get("_palette_table")
+        if palette is None and self._source is not None:
+            palette = _shared_palettes.get(self._source)
+        if palette is None:
+            names = [name for name in self.keys() if _normalize_hex(self[name]) is not None]
+            rgb   = hex_to_rgb_array([_normalize_hex(self[name]) for name in names], normalize = True).reshape(-1, 3)
+            oklab = rgb_to_oklab_array(rgb)
+
+            distances = np.linalg.norm(oklab[:, None] - oklab[None], axis = -1)
+            palette = _Palette(np.array(names), np.array([self[name] for name in names]),
+                               rgb_to_hls_array(rgb), oklab, cKDTree(oklab), distances)
+            if self._source is not None:
+                _shared_palettes[self._source] = palette
+        self.__dict__["_palette_table"] = palette
+        return palette
 
     @cached_property
     def object_list(self):
-        tmp_object = _colorwheeldotdict()
-
-        for key in self.keys():
-            tmp_object[key] = Color(self[key])
-        return tmp_object
+        """
+        Color objects for every wheel color, each one created the first time it is looked up.
+        """
+        return _colorobjectdict(self)
 
     @property
     def num_colors(self):
@@ -78,10 +351,20 @@ class ColorWheel(_colorwheeldotdict):
         return "bold"
     
     def get_name(self, hexcode):
-        for name, hex in zip(self.keys(), self.values()):
-            if hexcode == hex:
-                return name
-        return None
+        """
+        Returns the name of the given color, or None if it is not in the wheel.
+        Accepts "#RGB"/"#RRGGBB" hex codes in any case or an RGB tuple.
+        If several names share the color, the first one in the wheel is returned.
+        Duplicate names in color_list.txt keep the position of their first entry and the color of their last.
+        """
+        names = self._hex_index.get(_normalize_hex(hexcode))
+        return names[0] if names else None
+
+    def get_names(self, hexcode):
+        """
+        Returns every name of the given color in wheel order, or an empty list if it is not in the wheel.
+        """
+        return list(self._hex_index.get(_normalize_hex(hexcode), []))
 
     def get_random_color(self, n = 1):
         return np.random.choice(list(self.values()), size = n, replace = False)
@@ -89,24 +372,20 @@ class ColorWheel(_colorwheeldotdict):
     def in_wheel(self, inp):
         """
         Returns True if input is in the color wheel.
+        Input can be a color name, a "#RGB"/"#RRGGBB" hex code in any case or an RGB tuple.
         """
-        if inp in self.keys() or inp in self.values():
+        if isinstance(inp, str) and inp in self:
             return True
-        
-        return False
+
+        return _normalize_hex(inp) in self._hex_index
     
     def hex_to_rgb(self, hex_code, normalize = False):
         """
         Input: Hex String
         Output: integer RGB values
         """
-        hex_code = hex_code.lstrip("#")
-        RGB_vals = tuple(int(hex_code[i:i+2], 16) for i in (0, 2, 4))
-        
-        if normalize: 
-            RGB_vals = (RGB_vals[0] / 255, RGB_vals[1] / 255, RGB_vals[2] / 255)
-        
-        return RGB_vals
+        rgb = hex_to_rgb_array(hex_code, normalize = normalize)[0]
+        return tuple(float(x) if normalize else int(x) for x in rgb)
     
     def rgb_to_hex(self, rgb):
         """
@@ -114,18 +393,7 @@ class ColorWheel(_colorwheeldotdict):
         Output: Hex Representation of color
         """
         bool_test = [type(x) == int for x in rgb]
-        rgb = [max(x, 0) for x in rgb]
-        
-        if False in bool_test:
-            int_rgb = (rgb[0] * 255, rgb[1] * 255, rgb[2] * 255)
-            int_rgb = [int(x) for x in int_rgb]
-            int_rgb = tuple(int_rgb)
-        else:
-            int_rgb = [int(x) for x in rgb]
-            int_rgb = tuple(int_rgb)
-            
-        
-        return '#%02x%02x%02x' % tuple(int_rgb)
+        return str(rgb_to_hex_array([list(rgb)], normalized = False in bool_test)[0])
     
     def lighten_color(self, color, amount = 1, return_rgb = False):
         """
@@ -145,29 +413,19 @@ class ColorWheel(_colorwheeldotdict):
         >> lighten_color((.3,.55,.1), amount = 0.5)
         """
 
-        c = colorsys.rgb_to_hls(*mc.to_rgb(color))
-        rgb = colorsys.hls_to_rgb(c[0], 1 - amount * (1 - c[1]), c[2])
-        
+        rgb = lighten_array(color, amount, return_rgb = True)[0]
+
         if return_rgb:
-            return rgb
+            return tuple(float(x) for x in rgb)
         else:
-            return self.rgb_to_hex(rgb)
+            return str(rgb_to_hex_array(rgb, normalized = True)[0])
         
     def blend(self, color1, color2, ratio = .5, demo = False):
         """
         Blends to given colors. Input must be hex code
         Returns blended color in hex code
         """
-        colorRGBA1 = self.hex_to_rgb(color1)
-        colorRGBA2 = self.hex_to_rgb(color2)
-        
-        amount = int(255 * ratio)
-        
-        red   = (colorRGBA1[0] * (255 - amount) + colorRGBA2[0] * amount) / 255
-        green = (colorRGBA1[1] * (255 - amount) + colorRGBA2[1] * amount) / 255
-        blue  = (colorRGBA1[2] * (255 - amount) + colorRGBA2[2] * amount) / 255
-        
-        result = self.rgb_to_hex((int(red), int(green), int(blue)))
+        result = str(blend_array(color1, color2, ratio)[0])
 
         if demo:
             color_list = [color1, result, color2]
@@ -189,7 +447,7 @@ class ColorWheel(_colorwheeldotdict):
         
         return result
 
-    def demo_colors(self, selection = "all", background = "white", fontname = "Dejavu Sans"):
+    def demo_colors(self, selection = "all", background = "white", fontname = "Dejavu Sans", png = False):
         """
         Shows a plot demo for the available colors.
         set selection to 
@@ -198,16 +456,138 @@ class ColorWheel(_colorwheeldotdict):
             list of color names or hex codes (can not mix both) for a specific selection of colors
         Change background to look at colors with different backgrounds
         set fontname to see different fonts
-        Returns axis object
+        set png to True to render off-screen (without pyplot) and get the PNG file as bytes instead
+        Returns axis object, or PNG bytes if png is True
         """
+        if png:
+            return self.__demo_colors_png(background = background, selection = selection, fontname = fontname)
         if self.__isnotebook:
             return self.__demo_colors_notebook(background = background, selection = selection, fontname = fontname)
         else:
             return self.__demo_colors_spyder(background = background, selection = selection, fontname = fontname)
 
+    def nearest_color(self, color, k = 1, return_name = False):
+        """
+        Snaps arbitrary colors to the closest colors in the wheel, measured by perceptual (OKLab) distance.
+        Parameters:
+            color: a matplotlib color (hex code, name, RGB tuple) or a list of colors
+            k: number of nearest wheel colors to return per input color
+            return_name: return wheel color names instead of hex codes
+        Returns:
+            for a single color, the nearest hex code (k = 1) or a list of the k nearest.
+            for a list of colors, a list with one such result per color.
+        """
+        single = isinstance(color, str) or (len(color) in (3, 4) and not isinstance(color[0], (str, list, tuple, np.ndarray)))
+
+        palette = self._palette
+        k = min(k, len(palette.names))
+        distance, index = palette.tree.query(rgb_to_oklab_array(to_rgb_array(color)), k = k)
+        index = np.asarray(index).reshape(-1, k)
+
+        lookup = palette.names if return_name else palette.hex
+        results = [[str(x) for x in lookup[row]] for row in index]
+        if k == 1:
+            results = [x[0] for x in results]
+        return results[0] if single else results
+
+    def distinct_palette(self, k, avoid = [], background = None, return_name = False):
+        """
+        Picks k wheel colors that are as distinguishable from each other as possible.
+        Colors are chosen greedily, each time adding the color whose smallest perceptual (OKLab) distance
+        to the colors already chosen is largest.
+        Parameters:
+            k: number of colors to return
+            avoid: list of wheel color names or hex codes that can not be chosen
+            background: optional background color. Colors close to it are avoided as if it had already been chosen.
+            return_name: return wheel color names instead of hex codes
+        Returns:
+            list of k hex codes (or names) in the order they were chosen
+        """
+        palette = self._palette
+
+        avoid_hex = {_normalize_hex(x) for x in avoid}
+        allowed = np.array([name not in avoid and _normalize_hex(hexcode) not in avoid_hex
+                            for name, hexcode in zip(palette.names, palette.hex)], dtype = bool)
+        candidates = np.flatnonzero(allowed)
+        if k > len(candidates):
+            raise ValueError(f"Can not pick {k} colors, only {len(candidates)} are available.")
+        if k <= 0:
+            return []
+
+        distances = palette.distances[np.ix_(candidates, candidates)]
+
+        if background is not None:
+            min_distance = np.linalg.norm(palette.oklab[candidates] - rgb_to_oklab_array(to_rgb_array(background)), axis = -1)
+            chosen = [int(np.argmax(min_distance))]
+        else:
+            #start from the most distant pair
+            chosen = [int(np.argmax(distances)) // len(candidates)]
+            min_distance = np.full(len(candidates), np.inf)
+
+        min_distance = np.minimum(min_distance, distances[chosen[0]])
+        while len(chosen) < k:
+            min_distance[chosen] = -1
+            chosen.append(int(np.argmax(min_distance)))
+            min_distance = np.minimum(min_distance, distances[chosen[-1]])
+
+        lookup = palette.names if return_name else palette.hex
+        return [str(x) for x in lookup[candidates[chosen]]]
+
+    def simulate_cvd(self, colors, vision = "deutan", severity = 1):
+        """
+        Shows how colors look with a color vision deficiency.
+        colors: wheel names or hex codes
+        vision: "protan", "deutan", "tritan", or a list of them
+        severity: float from 0-1, default is 1
+        Returns array of hex codes, one row per vision type if vision is a list
+        """
+        return simulate_cvd(self._to_hex_list(colors), vision, severity)
+
+    def check_palette(self, colors, light = "#ffffff", dark = "#000000", severity = 1):
+        """
+        Checks whether a palette is distinguishable with protan, deutan and tritan color vision and
+        how well it contrasts with a light and a dark background.
+        colors: wheel names or hex codes
+        Returns PaletteAccessibility (see viper.ColorWheel.accessibility.palette_accessibility), e.g.
+            report.min_distance: smallest OKLab distance between two colors for each of report.vision
+            report.contrast: (n, 2) WCAG contrast ratios against light and dark
+        """
+        return palette_accessibility(self._to_hex_list(colors), light, dark, severity)
+
+    def _to_hex_list(self, colors):
+        if isinstance(colors, (str, Color)):
+            colors = [colors]
+        return [self[x] if isinstance(x, str) and x in self else str(x) if isinstance(x, Color) else x for x in colors]
+
+    def find_contrast_colors(self, colors, n = 1, hue_weight = 1, sat_weight = 1, lum_weight = 1, avoid = []):
+        """
+        Vectorized find_contrast_color: finds the top n contrasting wheel colors for every color in a list at once.
+        Returns a list with one list of n hex codes per input color.
+        """
+        palette = self._palette
+
+        query = rgb_to_hls_array(to_rgb_array(colors))
+        avoid = [_normalize_hex(x) for x in avoid]
+        allowed = np.array([name not in _neutral_colors and _normalize_hex(hexcode) not in avoid
+                            for name, hexcode in zip(palette.names, palette.hex)], dtype = bool)
+        table = palette.hls[allowed]
+
+        #hue is circular, so the distance wraps around and is rescaled to 0-1
+        hue_diff = np.abs(query[:, None, 0] - table[None, :, 0])
+        hue_diff = 2 * np.minimum(hue_diff, 1 - hue_diff) * hue_weight
+        lum_diff = np.abs(query[:, None, 1] - table[None, :, 1]) * lum_weight
+        sat_diff = np.abs(query[:, None, 2] - table[None, :, 2]) * sat_weight
+
+        contrast = np.sqrt(hue_diff + lum_diff + sat_diff)
+
+        #stable sort keeps wheel order between equally contrasting colors
+        order = np.argsort(-contrast, axis = 1, kind = "stable")[:, :n]
+        return [[str(x) for x in row] for row in palette.hex[allowed][order]]
+
     def find_contrast_color(self, og_color, n = 1, hue_weight = 1, sat_weight = 1, lum_weight = 1, avoid = [], demo = False):
         """
         Find the top n contrasting colors in the color wheel.
+        Hue differences wrap around the color circle, so reds near both ends of the hue range count as similar.
         Parameters:
             n: number of colors to return
             XX_weight: adjust weighting of hue (hue_weight), luminance (lum_weight), or saturation (sat_weight). 
@@ -216,25 +596,8 @@ class ColorWheel(_colorwheeldotdict):
         Returns:
             list of top n contrasting colors
         """
-        curr_hls = colorsys.rgb_to_hls(*mc.to_rgb(og_color))
-
-        contrast_array = []
-        for color in self.keys():
-            if color in ["white", "black", "dark_grey", "light_grey", "grey"] or self[color] in avoid:
-                continue
-            else:
-                new_hls = colorsys.rgb_to_hls(*mc.to_rgb(self[color]))
-
-                hue_diff = (abs(curr_hls[0] - new_hls[0]))*(hue_weight)
-                lum_diff = (abs(curr_hls[1] - new_hls[1]))*(lum_weight)
-                sat_diff = (abs(curr_hls[2] - new_hls[2]))*(sat_weight)
-
-                contrast_ratio = (hue_diff + lum_diff + sat_diff)**.5
-
-                contrast_array.append( [self[color], contrast_ratio] )
-
-        contrast_array.sort(key = lambda x: -x[1])
-        return_array = [contrast_array[i][0] for i in range(n)]
+        return_array = self.find_contrast_colors([og_color], n = n, hue_weight = hue_weight, sat_weight = sat_weight,
+                                                 lum_weight = lum_weight, avoid = avoid)[0]
         
         if demo:
             x = return_array
@@ -257,6 +620,9 @@ class ColorWheel(_colorwheeldotdict):
         n: number of colors to generate
         allow_darker: allows gradient to go darker than the given color
         """
+        if isinstance(color, Color):
+            color = str(color)
+
         if color in self.color_list:
             hex_color = self[color]
         elif type(color) == str and color[0] == "#":
@@ -265,9 +631,10 @@ class ColorWheel(_colorwheeldotdict):
             raise ValueError(f"Invalid Color Input: {color}. Input must be hex code or a color name in the color wheel.")
             
         if allow_darker:
-            luminance_list = [self.lighten_color(hex_color, amount = (x+1)/int(n/2+1)) for x in range(n) ]
+            amounts = (np.arange(n) + 1) / int(n/2+1)
         else:
-            luminance_list = [self.lighten_color(hex_color, amount = (x+1)/int(n+1)) for x in range(n) ]
+            amounts = (np.arange(n) + 1) / int(n+1)
+        luminance_list = [str(x) for x in lighten_array(hex_color, amounts)]
         if demo:
             x = luminance_list
             plt.figure(dpi = 300, figsize = (3,3))
@@ -286,12 +653,15 @@ class ColorWheel(_colorwheeldotdict):
     def create_cmap(self, color_list, demo = False):
         """
         Creates a matplotlib cmap from given color list.
+        Colormaps are memoized by their colors (see colormaps.py), the returned cmap is a copy that is safe to modify.
         """
+        color_list = [str(c) if isinstance(c, Color) else c for c in color_list]
+
         all_names = 1
         all_hex = 1
 
         for c in color_list:
-            if c not in self.color_list:
+            if c not in self:
                 all_names = 0
                 break
 
@@ -304,12 +674,11 @@ class ColorWheel(_colorwheeldotdict):
             raise ValueError("Input list does not contain valid color names or hex codes.")
 
         if all_names:
-            cmap_colors = [self.hex_to_rgb(self[x], normalize = True) for x in color_list]
+            cmap_colors = [self[x] for x in color_list]
         elif all_hex:
-            cmap_colors = [self.hex_to_rgb(x, normalize = True) for x in color_list]
+            cmap_colors = color_list
 
-        cm = LinearSegmentedColormap.from_list(
-                "Custom", cmap_colors, N=100)
+        cm = cached_cmap(cmap_colors, N = 100).copy()
         if demo:
             mat = np.indices((100,100))[1]
             plt.imshow(mat, cmap=cm)
@@ -322,63 +691,87 @@ class ColorWheel(_colorwheeldotdict):
         r, g, b = (int(hexrgb[i:i+2], 16) / 255.0 for i in range(0,5,2))
         return colorsys.rgb_to_hsv(r, g, b)
 
-    def __demo_colors_notebook(self, background = "white", selection = "all", fontname = "Dejavu Sans"):
+    def _demo_selection(self, selection):
         """
-        Shows a plot demo for the available colors.
-        Change background to look at colors with different backgrounds
-        Returns axis object
+        Returns the (name, hex code) pairs shown by demo_colors, sorted by hue.
         """
-        print(type(selection))
-        
-        if selection == "all":
+        if isinstance(selection, str) and selection == "all":
             color_keys = self.keys()
-        elif selection == "selection" or selection == "selected" or selection == "used":
+        elif isinstance(selection, str) and selection in ("selection", "selected", "used"):
             color_keys = self.colors_used
-            
+
         elif isinstance(selection, list) and len(selection) > 0:
             if selection[0][0] == "#": #hex codes, need names
                 color_keys = [self.get_name(x) for x in selection]
             else:
                 color_keys = selection
-            
+
         else:
             raise ValueError(f"Unsupported selection \"{selection}\"")
-            
-        num_colors = len(color_keys)
-        
+
         #attempt to sort colors by hue
         color_list = [(x, self[x]) for x in color_keys]
         color_list.sort(key=self._get_hsv)
+        return color_list
 
-        fig = plt.figure(dpi = 150, figsize = (4, max(3, 7/28 * num_colors)))
-        ax = plt.gca()
-        plt.tight_layout()
-        
-        plt.ylim(0, num_colors*1.3 +1)
-        plt.xlim(0, 1.8)
-        plt.yticks([])
-        plt.xticks([])
-
-        for i, pairing in enumerate(color_list):
-            color = pairing[0]
-            hexcode = pairing[1]
-            plt.barh((num_colors - i) *1.3, 1, color = hexcode, height = 1)
-            
-            if color == "white":
-                fontcolor = "black"
-            else :
-                fontcolor = "white"
-                
-            plt.text(0.1, 1.3*(num_colors - i) , color, ha = "left", va = "center", color = fontcolor, fontsize = 9, 
-                    fontname = fontname)
-            plt.text(1.05, 1.3*(num_colors - i) , color, ha = "left", va = "center", color = hexcode, fontsize = 9,
-                    fontweight = "bold", fontname = fontname)
+    def _draw_demo(self, fig, ax, color_list, rows, fontsize, fontname, background):
+        """
+        Draws the swatches of color_list in columns of rows colors onto ax. The whole demo is three artists:
+        one PatchCollection for the swatches and one PathCollection for each set of labels.
+        """
+        num_colors = len(color_list)
+        n_columns  = max(1, -(-num_colors // rows))
+
+        ax.set_ylim(0, rows*1.3 +1)
+        ax.set_xlim(0, 1.8 * n_columns)
+        ax.set_yticks([])
+        ax.set_xticks([])
+
+        index = np.arange(num_colors)
+        x = 1.8 * (index // rows)
+        y = 1.3 * (rows - index % rows)
+        names = [pairing[0] for pairing in color_list]
+        hex_codes = [pairing[1] for pairing in color_list]
+
+        swatches = [Rectangle((x0, y0 - .5), 1, 1) for x0, y0 in zip(x, y)]
+        ax.add_collection(PatchCollection(swatches, facecolors = hex_codes, edgecolors = "none"))
+
+        #label outlines are laid out in points and placed at data coordinates
+        points_to_pixels = Affine2D().scale(1 / 72) + fig.dpi_scale_trans
+        regular = FontProperties(family = fontname)
+        bold    = FontProperties(family = fontname, weight = "bold")
+        fontcolors = label_color(hex_codes) if num_colors > 0 else []
+
+        for dx, props, colors in [(0.1, regular, fontcolors), (1.05, bold, hex_codes)]:
+            #center vertically on the line height, like va = "center"
+            line = TextPath((0, 0), "lp", size = fontsize, prop = props).get_extents()
+            shift = Affine2D().translate(0, -(line.y0 + line.y1) / 2)
+            paths = [shift.transform_path(TextPath((0, 0), name, size = fontsize, prop = props)) for name in names]
+
+            ax.add_collection(PathCollection(paths, offsets = np.column_stack([x + dx, y]), offset_transform = ax.transData,
+                                             transform = points_to_pixels, facecolors = colors, edgecolors = "none",
+                                             clip_on = False))
 
         ax.spines.right.set_visible(False)
         ax.spines.top.set_visible(False)
         ax.set_facecolor(background)
         fig.patch.set_color(self.none)
         return ax
+
+    def __demo_colors_notebook(self, background = "white", selection = "all", fontname = "Dejavu Sans"):
+        """
+        Shows a plot demo for the available colors.
+        Change background to look at colors with different backgrounds
+        Returns axis object
+        """
+        color_list = self._demo_selection(selection)
+        num_colors = len(color_list)
+
+        fig = plt.figure(dpi = 150, figsize = (4, max(3, 7/28 * num_colors)))
+        ax = plt.gca()
+        plt.tight_layout()
+
+        return self._draw_demo(fig, ax, color_list, max(1, num_colors), 9, fontname, background)
     
     def __demo_colors_spyder(self, background = "white", selection = "all", fontname = "Dejavu Sans"):
         """
@@ -386,71 +779,35 @@ class ColorWheel(_colorwheeldotdict):
         Change background to look at colors with different backgrounds
         Returns axis object
         """
-        if selection == "all":
-            color_keys = self.keys()
-        elif selection == "selection" or selection == "selected" or selection == "used":
-            color_keys = self.colors_used
-            
-        elif type(selection) == type(list):
-            color_keys = selection
-            
-        else:
-            raise ValueError(f"Unsupported selection \"{selection}\"")
-            
-        num_colors = len(color_keys)
-        
-        #attempt to sort colors by hue
-        color_list = [(x, self[x]) for x in color_keys]
-        color_list.sort(key=self._get_hsv)
+        color_list = self._demo_selection(selection)
+        num_colors = len(color_list)
+        n_plots = max(1, -(-num_colors // 10))
 
-        iter_color_list = iter(color_list)
-        if self.num_colors % 10 == 0:
-            n_plots = self.num_colors // 10 
-        else:
-            n_plots = self.num_colors //10 + 1
-            
-        fig, axes = plt.subplots(nrows = 1, ncols = n_plots, dpi = 150, figsize = (3 * n_plots, max(3, (7/28 * num_colors)/ n_plots)))
-        plt.subplots_adjust(wspace = 0)
-        for j in range(n_plots):
-            ax = axes[j]
-
-            ax.set_ylim(0, 10*1.3 +1)
-            ax.set_xlim(0, 1.8)
-            ax.set_yticks([])
-            ax.set_xticks([])
-
-            if j+1 == n_plots and num_colors %10 != 0:
-                plotted_colors = num_colors % 10
-                print(plotted_colors)
-            else:
-                plotted_colors = 10
-            for i in range(plotted_colors):
-                pairing = next(iter_color_list)
-                color = pairing[0]
-                hexcode = pairing[1]
-                ax.barh((10 - i) *1.3, 1, color = hexcode, height = 1)
-
-                if color == "white":
-                    fontcolor = "black"
-                else :
-                    fontcolor = "white"
-
-                ax.text(0.1, 1.3*(10 - i) , color, ha = "left", va = "center", color = fontcolor, fontsize = 7, 
-                        fontname = fontname)
-                ax.text(1.05, 1.3*(10 - i) , color, ha = "left", va = "center", color = hexcode, fontsize = 7,
-                        fontweight = "bold", fontname = fontname)
-
-            ax.spines.right.set_visible(False)
-            ax.spines.top.set_visible(False)
-            ax.set_facecolor(background)
-        fig.patch.set_color(self.none)
+        fig = plt.figure(dpi = 150, figsize = (3 * n_plots, max(3, (7/28 * num_colors)/ n_plots)))
+        ax = fig.add_subplot()
+        ax = self._draw_demo(fig, ax, color_list, 10, 7, fontname, background)
         plt.show()
         return ax
+
+    def __demo_colors_png(self, background = "white", selection = "all", fontname = "Dejavu Sans"):
+        """
+        Renders the column layout of the plot demo off-screen with the Agg canvas.
+        Returns the PNG file as bytes
+        """
+        color_list = self._demo_selection(selection)
+        num_colors = len(color_list)
+        n_plots = max(1, -(-num_colors // 10))
+
+        fig = MplFigure(dpi = 150, figsize = (3 * n_plots, max(3, (7/28 * num_colors)/ n_plots)))
+        FigureCanvasAgg(fig)
+        self._draw_demo(fig, fig.add_subplot(), color_list, 10, 7, fontname, background)
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format = "png")
+        return buffer.getvalue()
     
     def _get_name(self, hexcode):
-        for x in self.keys():
-            if hexcode == self[x]:
-                return x
+        return self.get_name(hexcode)
             
     def __str__(self):
         self.demo_colors()
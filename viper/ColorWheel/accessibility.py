@@ -0,0 +1,118 @@
+"""
+Color vision deficiency (CVD) simulation and text contrast checks for whole palettes.
+Every function takes a single color or a list of colors and works on all of them with one matrix operation.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .color_math import to_rgb_array, srgb_to_linear, linear_to_srgb, rgb_to_oklab_array, rgb_to_hex_array
+
+#full severity dichromacy matrices acting on linear RGB (Machado, Oliveira & Fernandes 2009)
+_cvd_matrices = {
+    "protan": np.array([[ 0.152286,  1.052583, -0.204868],
+                        [ 0.114503,  0.786281,  0.099216],
+                        [-0.003882, -0.048116,  1.051998]]),
+    "deutan": np.array([[ 0.367322,  0.860646, -0.227968],
+                        [ 0.280085,  0.672501,  0.047413],
+                        [-0.011820,  0.042940,  0.968881]]),
+    "tritan": np.array([[ 1.255528, -0.076749, -0.178779],
+                        [-0.078411,  0.930809,  0.147602],
+                        [ 0.004733,  0.691367,  0.303900]]),
+}
+
+#every vision type reported by palette_accessibility, "normal" first
+VISION_TYPES = ("normal",) + tuple(_cvd_matrices)
+
+PaletteAccessibility = namedtuple("PaletteAccessibility", ["hex", "vision", "distances", "min_distance", "contrast", "backgrounds"])
+
+def _matrices(vision, severity):
+    """
+    Stacks the (v, 3, 3) simulation matrices of the given vision types. Severities below 1 are
+    interpolated linearly towards normal vision.
+    """
+    if isinstance(vision, str):
+        vision = [vision]
+    matrices = []
+    for kind in vision:
+        if kind == "normal":
+            matrices.append(np.eye(3))
+        elif kind in _cvd_matrices:
+            matrices.append((1 - severity) * np.eye(3) + severity * _cvd_matrices[kind])
+        else:
+            raise ValueError(f"Unknown vision type \"{kind}\", use one of {VISION_TYPES}")
+    return np.stack(matrices)
+
+def simulate_cvd(colors, vision = "deutan", severity = 1, return_rgb = False):
+    """
+    Simulates how colors look with a color vision deficiency.
+    Input
+        colors: hex code, color name or RGB tuple, or a list of them
+        (optional) vision: "protan", "deutan", "tritan" or "normal", or a list of them. Default is "deutan".
+        (optional) severity: float from 0-1, default is 1 (dichromacy)
+        (optional) return_rgb: return float RGB values instead of hex codes
+    Output
+        array of n hex codes, or (v, n) hex codes if vision is a list. (..., 3) float RGB values if return_rgb is True.
+    """
+    linear = srgb_to_linear(to_rgb_array(colors))
+    rgb = linear_to_srgb(np.einsum("vij,nj->vni", _matrices(vision, severity), linear))
+    if isinstance(vision, str):
+        rgb = rgb[0]
+
+    if return_rgb:
+        return rgb
+    return rgb_to_hex_array(np.round(rgb.reshape(-1, 3) * 255).astype(np.int64), normalized = False).reshape(rgb.shape[:-1])
+
+def pairwise_distances(colors, vision = VISION_TYPES, severity = 1):
+    """
+    Perceptual (OKLab) distance between every pair of colors as seen with each vision type.
+    Output: (v, n, n) float array, one distance matrix per vision type
+    """
+    oklab = rgb_to_oklab_array(simulate_cvd(colors, list(vision) if not isinstance(vision, str) else [vision], severity, return_rgb = True))
+    return np.linalg.norm(oklab[:, :, None] - oklab[:, None], axis = -1)
+
+def relative_luminance(colors):
+    """
+    WCAG relative luminance of every color, from 0 (black) to 1 (white).
+    """
+    return srgb_to_linear(to_rgb_array(colors)) @ np.array([0.2126, 0.7152, 0.0722])
+
+def contrast_ratio(colors, backgrounds):
+    """
+    WCAG contrast ratio of every color against every background, from 1 to 21.
+    4.5 is the minimum for normal text, 3 for large text and graphics.
+    Output: (n, m) float array
+    """
+    fg = relative_luminance(colors)[:, None]
+    bg = relative_luminance(backgrounds)[None, :]
+    return (np.maximum(fg, bg) + 0.05) / (np.minimum(fg, bg) + 0.05)
+
+def label_color(backgrounds, light = "#ffffff", dark = "#000000"):
+    """
+    Picks the text color with the higher contrast on each background.
+    Output: array of hex codes (light or dark) with one entry per background
+    """
+    options = np.array([str(rgb_to_hex_array(to_rgb_array(light))[0]), str(rgb_to_hex_array(to_rgb_array(dark))[0])])
+    return options[np.argmax(contrast_ratio(backgrounds, [light, dark]), axis = 1)]
+
+def palette_accessibility(colors, light = "#ffffff", dark = "#000000", severity = 1):
+    """
+    Checks a palette for color vision deficiencies and text contrast in one pass.
+    Output
+        PaletteAccessibility with
+            hex: the palette as hex codes
+            vision: the vision types of the distance matrices, ("normal", "protan", "deutan", "tritan")
+            distances: (v, n, n) pairwise OKLab distances under each vision type
+            min_distance: (v,) smallest distance between two different colors under each vision type.
+                Pairs closer than about 0.05 are hard to tell apart.
+            contrast: (n, 2) WCAG contrast ratios against the light and dark background
+            backgrounds: (light, dark)
+    """
+    hex_codes = rgb_to_hex_array(to_rgb_array(colors))
+    distances = pairwise_distances(hex_codes, VISION_TYPES, severity)
+
+    off_diagonal = ~np.eye(len(hex_codes), dtype = bool)
+    min_distance = distances[:, off_diagonal].min(axis = 1) if len(hex_codes) > 1 else np.full(len(VISION_TYPES), np.inf)
+
+    return PaletteAccessibility(hex_codes, VISION_TYPES, distances, min_distance,
+                                contrast_ratio(hex_codes, [light, dark]), (light, dark))
@@ -0,0 +1,222 @@
+"""
+Array-in/array-out color conversions. Every function takes a single color or a list/array of colors
+and works on all of them at once with NumPy. The scalar helpers on ColorWheel and Color are thin
+wrappers over these functions.
+"""
+import numpy as np
+import matplotlib.colors as mc
+
+ONE_THIRD = 1.0 / 3.0
+ONE_SIXTH = 1.0 / 6.0
+TWO_THIRD = 2.0 / 3.0
+
+#ascii code -> value of a hex digit
+#255 marks bytes that are not hex digits
+_hex_values = np.full(256, 255, dtype = np.uint8)
+_hex_values[np.frombuffer(b"0123456789abcdef", dtype = np.uint8)] = np.arange(16)
+_hex_values[np.frombuffer(b"ABCDEF", dtype = np.uint8)] = np.arange(10, 16)
+
+_hex_digits = np.frombuffer(b"0123456789abcdef", dtype = np.uint8)
+
+#linear sRGB -> LMS and LMS -> OKLab matrices (Ottosson 2020)
+_oklab_lms = np.array([[0.4122214708, 0.5363325363, 0.0514459929],
+                       [0.2119034982, 0.6806995451, 0.1073969566],
+                       [0.0883024619, 0.2817188376, 0.6299787005]])
+_oklab_lab = np.array([[0.2104542553,  0.7936177850, -0.0040720468],
+                       [1.9779984951, -2.4285922050,  0.4505937099],
+                       [0.0259040371,  0.7827717662, -0.8086757660]])
+
+def _as_list(colors):
+    """
+    Wraps a single hex string or RGB tuple (or Color) in a list so every function can treat its input as a batch.
+    """
+    if isinstance(colors, str):
+        return [colors]
+    if isinstance(colors, np.ndarray):
+        if colors.dtype.kind in "US":
+            return colors.ravel()
+        return colors[None] if colors.ndim == 1 else colors
+    if len(colors) > 0 and not np.iterable(colors[0]):
+        return [colors]
+    return colors
+
+def _is_hex(code):
+    """
+    True if every character of code is a hex digit.
+    """
+    return code.isascii() and (_hex_values[np.frombuffer(code.encode("ascii"), dtype = np.uint8)] != 255).all()
+
+def hex_to_rgb_array(hex_codes, normalize = False):
+    """
+    Input: hex string or list/array of hex strings, "#RRGGBB" or "#RGB", with or without "#"
+    Output: (n, 3) integer RGB values from 0-255, or floats from 0-1 if normalize is True
+    """
+    originals = _as_list(hex_codes)
+    hex_codes = [str(x).strip().lstrip("#") for x in originals]
+    hex_codes = ["".join(2 * c for c in x) if len(x) == 3 else x for x in hex_codes]
+    if any(len(x) != 6 for x in hex_codes):
+        raise ValueError("Hex codes must have 3 or 6 digits.")
+
+    try:
+        digits = _hex_values[np.frombuffer("".join(hex_codes).encode("ascii"), dtype = np.uint8)].reshape(-1, 3, 2)
+    except UnicodeEncodeError:
+        digits = None
+    if digits is None or (digits == 255).any():
+        bad = next(x for x, code in zip(originals, hex_codes) if not _is_hex(code))
+        raise ValueError(f"Invalid hex code \"{bad}\"")
+    rgb = digits[..., 0].astype(np.int64) * 16 + digits[..., 1]
+
+    if normalize:
+        return rgb / 255
+    return rgb
+
+def to_rgb_array(colors):
+    """
+    Input: any matplotlib color(s): hex strings, color names, or RGB(A) tuples with floats from 0-1
+    Output: (n, 3) float RGB values from 0-1
+    """
+    colors = _as_list(colors)
+
+    if len(colors) > 0 and all(isinstance(x, str) and x.startswith("#") and len(x) in (4, 7) for x in colors):
+        return hex_to_rgb_array(colors, normalize = True)
+
+    return mc.to_rgba_array(colors)[:, :3]
+
+def rgb_to_hex_array(rgb, normalized = None):
+    """
+    Input: (n, 3) RGB values, ex: [(.2, .8, .2)] or [(40, 185, 40)]
+        normalized: True for floats from 0-1, False for integers from 0-255,
+            None (default) guesses from the dtype of the input
+    Output: array of n lower case hex strings
+    Values are truncated to integers and clipped to 0-255, like ColorWheel.rgb_to_hex.
+    """
+    rgb = np.asarray(_as_list(rgb))[..., :3]
+
+    if normalized is None:
+        normalized = rgb.dtype.kind not in "iub"
+    if normalized:
+        rgb = rgb * 255
+
+    rgb = np.clip(np.trunc(rgb), 0, 255).astype(np.uint8)
+
+    codes = np.empty((len(rgb), 7), dtype = np.uint8)
+    codes[:, 0] = ord("#")
+    codes[:, 1::2] = _hex_digits[rgb >> 4]
+    codes[:, 2::2] = _hex_digits[rgb & 15]
+    return codes.view("S7").ravel().astype(str)
+
+def rgb_to_hls_array(rgb):
+    """
+    Vectorized colorsys.rgb_to_hls.
+    Input: (n, 3) float RGB values from 0-1
+    Output: (n, 3) float HLS values
+    """
+    rgb = np.asarray(rgb, dtype = float)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+
+    maxc = rgb.max(axis = -1)
+    minc = rgb.min(axis = -1)
+    sumc = maxc + minc
+    rangec = maxc - minc
+    l = sumc / 2.0
+
+    grey = minc == maxc
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        s = np.where(l <= 0.5, rangec / sumc, rangec / (2.0 - maxc - minc))
+
+        rc = (maxc - r) / rangec
+        gc = (maxc - g) / rangec
+        bc = (maxc - b) / rangec
+
+    h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    h = (h / 6.0) % 1.0
+
+    h = np.where(grey, 0.0, h)
+    s = np.where(grey, 0.0, s)
+    return np.stack([h, l, s], axis = -1)
+
+def _v(m1, m2, hue):
+    hue = hue % 1.0
+    return np.where(hue < ONE_SIXTH, m1 + (m2 - m1) * hue * 6.0,
+           np.where(hue < 0.5, m2,
+           np.where(hue < TWO_THIRD, m1 + (m2 - m1) * (TWO_THIRD - hue) * 6.0, m1)))
+
+def hls_to_rgb_array(hls):
+    """
+    Vectorized colorsys.hls_to_rgb.
+    Input: (n, 3) float HLS values
+    Output: (n, 3) float RGB values
+    """
+    hls = np.asarray(hls, dtype = float)
+    h, l, s = hls[..., 0], hls[..., 1], hls[..., 2]
+
+    m2 = np.where(l <= 0.5, l * (1.0 + s), l + s - (l * s))
+    m1 = 2.0 * l - m2
+
+    rgb = np.stack([_v(m1, m2, h + ONE_THIRD), _v(m1, m2, h), _v(m1, m2, h - ONE_THIRD)], axis = -1)
+    return np.where((s == 0.0)[..., None], l[..., None], rgb)
+
+def lighten_array(colors, amount = 1, return_rgb = False):
+    """
+    Lightens every color by multiplying (1-luminosity) by the given amount.
+    amount can be a single value or one value per color. A single color with several amounts returns
+    one shade per amount.
+        amount = 1 returns the same color
+        amount > 1 returns darker shades
+        amount < 1 returns lighter shades
+    Output: array of hex codes, or (n, 3) float RGB values if return_rgb is True
+    """
+    amount = np.asarray(amount, dtype = float)
+    hls = rgb_to_hls_array(to_rgb_array(colors))
+    if amount.ndim == 1 and len(hls) == 1:
+        hls = np.repeat(hls, len(amount), axis = 0)
+
+    hls[:, 1] = 1 - amount * (1 - hls[:, 1])
+    rgb = hls_to_rgb_array(hls)
+
+    if return_rgb:
+        return rgb
+    return rgb_to_hex_array(rgb, normalized = True)
+
+def _blend_rgb(rgb1, rgb2, amount):
+    """
+    Blends integer RGB values, giving rgb2 a weight of amount / 255. Output is truncated to integers.
+    """
+    amount = np.asarray(amount)[..., None]
+    return ((np.asarray(rgb1) * (255 - amount) + np.asarray(rgb2) * amount) / 255).astype(np.int64)
+
+def blend_array(colors1, colors2, ratio = .5, return_rgb = False):
+    """
+    Blends two lists of hex codes pairwise (a single color is blended with every color of the other list).
+    ratio is the weight of colors2, either a single value or one value per pair.
+    Output: array of hex codes, or (n, 3) float RGB values from 0-1 if return_rgb is True
+    """
+    amount = (255 * np.asarray(ratio, dtype = float)).astype(np.int64)
+    rgb = _blend_rgb(hex_to_rgb_array(colors1), hex_to_rgb_array(colors2), amount)
+
+    if return_rgb:
+        return rgb / 255
+    return rgb_to_hex_array(rgb, normalized = False)
+
+def srgb_to_linear(rgb):
+    """
+    Removes the sRGB gamma from float RGB values from 0-1.
+    """
+    rgb = np.asarray(rgb, dtype = float)
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+def rgb_to_oklab_array(rgb):
+    """
+    Converts (n, 3) float sRGB values from 0-1 to the perceptually uniform OKLab space.
+    Euclidean distances in OKLab approximate perceived color differences.
+    Output: (n, 3) float L, a, b values
+    """
+    lms = srgb_to_linear(rgb) @ _oklab_lms.T
+    return np.cbrt(lms) @ _oklab_lab.T
+
+def linear_to_srgb(rgb):
+    """
+    Applies the sRGB gamma to linear float RGB values from 0-1.
+    """
+    rgb = np.clip(np.asarray(rgb, dtype = float), 0, 1)
+    return np.where(rgb <= 0.0031308, rgb * 12.92, 1.055 * rgb ** (1 / 2.4) - 0.055)
@@ -0,0 +1,69 @@
+"""
+Memoized colormap factory. Colormaps are built once per set of color stops and N, and their lookup
+tables are kept as read-only arrays so large value arrays can be mapped with a single take.
+"""
+from functools import lru_cache
+
+import numpy as np
+from matplotlib.colors import LinearSegmentedColormap
+
+from .color_math import to_rgb_array
+
+def _stops(colors):
+    """
+    Normalizes a list of colors into a hashable tuple of RGB float tuples.
+    """
+    return tuple(tuple(float(x) for x in rgb) for rgb in to_rgb_array(list(colors)))
+
+@lru_cache(maxsize = 128)
+def _build_cmap(stops, N):
+    cmap = LinearSegmentedColormap.from_list("Custom", list(stops), N = N)
+
+    #integer input indexes the lookup table directly
+    lut = cmap(np.arange(N))
+    lut.flags.writeable = False
+    return cmap, lut
+
+def cached_cmap(colors, N = 100):
+    """
+    Returns the LinearSegmentedColormap through the given colors, building it only on the first request.
+    The colormap is shared between callers, use .copy() before changing it.
+    colors: list of hex codes, matplotlib color names or RGB tuples.
+    """
+    return _build_cmap(_stops(colors), int(N))[0]
+
+def cmap_lut(colors, N = 100):
+    """
+    Returns the read-only (N, 4) RGBA lookup table of the colormap through the given colors.
+    """
+    return _build_cmap(_stops(colors), int(N))[1]
+
+def map_values(values, colors, N = 100, vmin = 0, vmax = 1):
+    """
+    Maps an array of values onto the colormap through the given colors with one vectorized take.
+    Values are scaled from (vmin, vmax) to (0, 1) and binned like matplotlib colormaps do: values
+    outside the range get the end colors and nans are transparent.
+    Output: (..., 4) RGBA float array
+    """
+    lut = cmap_lut(colors, N)
+
+    x = (np.asarray(values, dtype = float) - vmin) / (vmax - vmin)
+    bad = np.isnan(x)
+    index = np.clip(np.nan_to_num(x * N), 0, N - 1).astype(np.intp)
+
+    rgba = lut.take(index, axis = 0)
+    if bad.any():
+        rgba[bad] = 0
+    return rgba
+
+def cache_info():
+    """
+    Returns the hit/miss statistics of the colormap cache.
+    """
+    return _build_cmap.cache_info()
+
+def cache_clear():
+    """
+    Removes every cached colormap.
+    """
+    _build_cmap.cache_clear()
@@ -1 +1,6 @@
 from .get_icons import healthy, elderly, hand, open_hand, foot, walking, reward, sight, punishment
+from .get_icons import icon_cache, batch_icons, icon_size
+from .cache import IconCache
+from .icon_scatter import icon_scatter, IconCollection
+from .icon_paths import icon_path, icon_path_collection
+from .atlas import build_atlas, IconAtlas
@@ -0,0 +1,117 @@
+import json
+
+import numpy as np
+from PIL import Image
+
+from .get_icons import _coverage, _icon_labels, _icon_rules, _mix_coverage, color_tables, normalize_hex
+
+class IconAtlas:
+    """
+    Sprite sheet holding many recolored icons in one RGBA array, usually created with build_atlas().
+    Every sprite is recorded in index as (icon, hex color, height) -> (row, column, height, width).
+
+    Individual icons are returned as views into the sheet, so slicing them out never copies pixels.
+    """
+    def __init__(self, image, index):
+        self.image = image
+        self.index = index
+
+    def get(self, icon, color, height):
+        """
+        Returns the (height, width, 4) view of one sprite in the atlas.
+        """
+        key = (icon, normalize_hex(color), int(height))
+        if key not in self.index:
+            raise ValueError(f"No sprite for {key} in atlas")
+        row, col, h, w = self.index[key]
+        return self.image[row:row + h, col:col + w]
+
+    def __getitem__(self, key):
+        return self.get(*key)
+
+    def __contains__(self, key):
+        icon, color, height = key
+        return (icon, normalize_hex(color), int(height)) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def save(self, path):
+        """
+        Writes the sprite sheet to path + ".png" and its index of offsets to path + ".json".
+        """
+        Image.fromarray(self.image).save(path + ".png")
+
+        sprites = [{"icon": icon, "color": color, "height": height, "row": row, "col": col, "h": h, "w": w}
+                   for (icon, color, height), (row, col, h, w) in self.index.items()]
+        with open(path + ".json", "w") as file:
+            json.dump({"shape": list(self.image.shape), "sprites": sprites}, file, indent = 1)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads an atlas written by save().
+        """
+        with open(path + ".json", "r") as file:
+            sprites = json.load(file)["sprites"]
+
+        image = np.asarray(Image.open(path + ".png").convert("RGBA"))
+        index = {(x["icon"], x["color"], x["height"]): (x["row"], x["col"], x["h"], x["w"]) for x in sprites}
+        return cls(image, index)
+
+    def __repr__(self):
+        return f"IconAtlas({self.image.shape[1]}x{self.image.shape[0]}, {len(self.index)} sprites)"
+
+def build_atlas(icons, colors, heights, padding = 1):
+    """
+    Packs every combination of icon, color and height into one sprite sheet.
+
+    Each (icon, height) pair forms one row of the sheet holding the icon in every color. The pair's
+    coverage is resampled once and all of its colors are mixed in a single vectorized pass, which is
+    written straight into the sheet.
+
+    Input
+        icons: list of icon names, e.g. ["walking", "sight"]. Use "hand_filled" or "foot_filled" for the filled variants.
+        colors: list of hex codes, e.g. ColorWheel().color_list_hex
+        heights: list of sprite heights in pixels. Widths follow each icon's aspect ratio.
+        (optional) padding: int, default is 1. Transparent pixels left between sprites.
+
+    Output
+        IconAtlas
+    """
+    colors  = list(dict.fromkeys(normalize_hex(c) for c in colors))
+    tables  = color_tables(colors)
+    heights = list(dict.fromkeys(int(h) for h in heights))
+
+    for icon in icons:
+        if icon not in _icon_rules:
+            raise ValueError(f"No such icon \"{icon}\"")
+
+    #lay out one row per (icon, height)
+    rows = []
+    for icon in icons:
+        icon_height, icon_width = _icon_labels(icon).shape
+        for height in heights:
+            width = max(1, round(height * icon_width / icon_height))
+            rows.append((icon, height, width))
+
+    sheet_width  = max(len(colors) * (width + padding) for icon, height, width in rows)
+    sheet_height = sum(height + padding for icon, height, width in rows)
+
+    image = np.zeros((sheet_height, sheet_width, 4), dtype = np.uint8)
+    image[..., :3] = 255
+    index = {}
+
+    top = 0
+    for icon, height, width in rows:
+        foreground, blend = _coverage(icon, (width, height))
+
+        #(k, h, w, 4) sprites written into a (h, k, w + padding, 4) view of the row
+        strip = image[top:top + height, :len(colors) * (width + padding)].reshape(height, len(colors), width + padding, 4)
+        strip[:, :, :width] = _mix_coverage(foreground, blend, tables).transpose(1, 0, 2, 3)
+
+        for i, color in enumerate(colors):
+            index[(icon, color, height)] = (top, i * (width + padding), height, width)
+        top += height + padding
+
+    return IconAtlas(image, index)
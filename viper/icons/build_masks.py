@@ -0,0 +1,67 @@
+"""
+Build step for the precompiled icon mask store.
+
+Run after adding or changing an icon in viper/images or its rule in get_icons._icon_rules:
+    python -m viper.icons.build_masks
+
+Each icon is stored as viper/icons/masks/<name>.npy, a uint8 array of shape (planes, H, ceil(W / 8))
+holding bit-packed rows. Plane 0 marks the opaque (non transparent) pixels, plane 1 is only present for
+two tone icons and marks the pixels that are blended with white. masks/index.json records the unpacked
+shape and the rule each mask was built with.
+
+The same step traces the vector outline of every icon (see icon_paths.py) into viper/icons/paths/<name>.npz.
+"""
+import json
+import os
+
+import numpy as np
+
+from . import get_icons
+from .get_icons import _icon_rules, _load_rgba, label_pixels, masks_path, BLEND, TRANSPARENT
+from .icon_paths import _save_paths, trace_icon, paths_path
+
+def pack_labels(labels, two_tone = False):
+    """
+    Packs an (H, W) label array into bit planes of shape (planes, H, ceil(W / 8)).
+    """
+    planes = [labels != TRANSPARENT]
+    if two_tone:
+        planes.append(labels == BLEND)
+    return np.packbits(np.stack(planes), axis = -1)
+
+def build_masks(output_dir = masks_path):
+    """
+    Decodes every icon once and writes its packed masks and the index to output_dir.
+    """
+    os.makedirs(output_dir, exist_ok = True)
+
+    index = {}
+    for name, rule in _icon_rules.items():
+        file_name, white_threshold, alpha_threshold, two_tone = rule
+        labels = label_pixels(_load_rgba(file_name), white_threshold, alpha_threshold, two_tone)
+
+        np.save(os.path.join(output_dir, name + ".npy"), pack_labels(labels, two_tone))
+        index[name] = {"shape": list(labels.shape), "rule": list(rule)}
+
+    with open(os.path.join(output_dir, "index.json"), "w") as file:
+        json.dump(index, file, indent = 4)
+
+    return index
+
+def build_paths(output_dir = paths_path):
+    """
+    Traces every icon from the current mask store and writes the outlines to output_dir.
+    """
+    #forget anything loaded before the masks were rebuilt
+    get_icons._labels.clear()
+    get_icons._pyramids.clear()
+    get_icons._mask_index = None
+
+    os.makedirs(output_dir, exist_ok = True)
+    for name in _icon_rules:
+        _save_paths(name, trace_icon(name), output_dir)
+
+if __name__ == "__main__":
+    for name, entry in build_masks().items():
+        print(f"{name}: {entry['shape'][1]}x{entry['shape'][0]}")
+    build_paths()
@@ -0,0 +1,118 @@
+from collections import OrderedDict, namedtuple
+import threading
+
+_unchanged = object()
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "currsize", "maxsize", "nbytes", "max_bytes"])
+
+class IconCache:
+    """
+    Bounded, thread safe LRU cache for recolored icon images.
+    Entries are evicted least recently used first once either the number of entries exceeds maxsize
+    or their combined pixel buffers exceed max_bytes.
+
+    Inputs
+        (optional) maxsize: int, default is 128. Maximum number of cached icons, None for no limit.
+        (optional) max_bytes: int, default is 64 MB. Maximum combined size of the cached images in bytes, None for no limit.
+
+    ****Note
+        Cached images are never handed out directly. get() returns a copy, so a caller drawing on or
+        resizing the returned image can not change what the next caller receives.
+    """
+    def __init__(self, maxsize = 128, max_bytes = 64 * 2**20):
+        self.maxsize   = maxsize
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()
+        self._lock    = threading.Lock()
+        self._nbytes  = 0
+
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Returns a copy of the cached image for key, or None if it is not cached.
+        """
+        with self._lock:
+            img = self._entries.get(key)
+            if img is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return img.copy()
+
+    def put(self, key, img):
+        """
+        Stores a copy of img under key and evicts old entries until the cache fits its limits.
+        """
+        img    = img.copy()
+        nbytes = self._sizeof(img)
+
+        #never cache an image that could not fit on its own
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._sizeof(self._entries.pop(key))
+            self._entries[key] = img
+            self._nbytes += nbytes
+            self._evict()
+
+    def resize(self, maxsize = _unchanged, max_bytes = _unchanged):
+        """
+        Changes the cache limits, evicting entries if the cache no longer fits.
+        Limits that are not passed are left as they are, pass None to remove a limit.
+        """
+        with self._lock:
+            if maxsize is not _unchanged:
+                self.maxsize = maxsize
+            if max_bytes is not _unchanged:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        """
+        Removes every cached icon and resets the hit/miss statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes   = 0
+            self.hits      = 0
+            self.misses    = 0
+            self.evictions = 0
+
+    def info(self):
+        """
+        Returns a CacheInfo tuple with the hit/miss statistics and current size of the cache.
+        """
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, len(self._entries),
+                             self.maxsize, self._nbytes, self.max_bytes)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def _evict(self):
+        while self._entries and ((self.maxsize is not None and len(self._entries) > self.maxsize) or
+                                 (self.max_bytes is not None and self._nbytes > self.max_bytes)):
+            key, img = self._entries.popitem(last = False)
+            self._nbytes -= self._sizeof(img)
+            self.evictions += 1
+
+    @staticmethod
+    def _sizeof(img):
+        return img.width * img.height * len(img.getbands())
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"IconCache({self.info()})"
@@ -0,0 +1,139 @@
+from collections import namedtuple
+import os
+
+import contourpy
+import numpy as np
+from matplotlib.collections import PathCollection
+from matplotlib.path import Path
+from matplotlib.transforms import IdentityTransform
+
+from viper.ColorWheel.Color import Color
+from .get_icons import _icon_pyramid, _icon_rules, _rule_name, color_tables, normalize_hex, head, BLEND, FOREGROUND
+
+paths_path = os.path.join(head, "icons", "paths")
+
+#outlines are traced from the first pyramid level whose longer side fits in this many pixels
+_trace_size = 256
+
+#traced outlines, filled on first use of each icon
+_paths = {}
+
+IconPaths = namedtuple("IconPaths", ["foreground", "blend"])
+
+def _trace(coverage):
+    """
+    Traces the 50% coverage outline of a coverage array into a single compound Path.
+    The path is centered on the origin and scaled to a height of 1.
+    """
+    height, width = coverage.shape
+    #pad so shapes touching the border still close
+    padded = np.pad(coverage, 1)
+
+    generator = contourpy.contour_generator(z = padded, fill_type = contourpy.FillType.OuterCode)
+    points, codes = generator.filled(0.5, 2)
+
+    if len(points) == 0:
+        return Path(np.zeros((0, 2)))
+
+    vertices = np.concatenate(points) - 1
+    vertices = np.column_stack([vertices[:, 0] - width / 2, height / 2 - vertices[:, 1]]) / height
+    return Path(vertices, np.concatenate(codes).astype(Path.code_type))
+
+def trace_icon(name):
+    """
+    Traces the foreground (and for two tone icons the blend) region of an icon into matplotlib Paths.
+    """
+    pyramid = _icon_pyramid(name)
+    level = 0
+    while level + 1 < len(pyramid) and max(pyramid[level][0].shape) > _trace_size:
+        level += 1
+
+    foreground, blend = pyramid[level]
+    two_tone = _icon_rules[name][3]
+    return IconPaths(_trace(foreground + blend if two_tone else foreground),
+                     _trace(blend) if two_tone else None)
+
+def _save_paths(name, paths, output_dir = paths_path):
+    arrays = {"rule": np.array([str(_icon_rules[name]), str(_trace_size)])}
+    for field, path in zip(paths._fields, paths):
+        if path is not None:
+            arrays[field + "_vertices"] = path.vertices
+            arrays[field + "_codes"]    = path.codes
+    np.savez_compressed(os.path.join(output_dir, name + ".npz"), **arrays)
+
+def _load_paths(name):
+    try:
+        with np.load(os.path.join(paths_path, name + ".npz")) as arrays:
+            if list(arrays["rule"]) != [str(_icon_rules[name]), str(_trace_size)]:
+                return None
+            return IconPaths(*[Path(arrays[field + "_vertices"], arrays[field + "_codes"])
+                               if field + "_vertices" in arrays else None for field in IconPaths._fields])
+    except (OSError, KeyError):
+        return None
+
+def _icon_paths(name):
+    paths = _paths.get(name)
+    if paths is None:
+        paths = _load_paths(name)
+        if paths is None:
+            paths = trace_icon(name)
+            try:
+                os.makedirs(paths_path, exist_ok = True)
+                _save_paths(name, paths)
+            except OSError: #read only install, keep the outline in memory only
+                pass
+        _paths[name] = paths
+    return paths
+
+def icon_path(icon, filled = False):
+    """
+    Returns the vector outline of an icon, traced once and cached on disk in viper/icons/paths.
+
+    Input
+        icon: str, name of the icon function, e.g. "walking" or "reward".
+        (optional) filled: bool, default is False. Use the filled variant of "foot" or "hand".
+
+    Output
+        IconPaths(foreground, blend) of matplotlib Paths centered on the origin with a height of 1.
+        The foreground covers the whole icon, blend is the lighter inner region of two tone icons
+        ("reward", "punishment") and None for every other icon.
+    """
+    return _icon_paths(_rule_name(icon, filled))
+
+def icon_path_collection(icon, offsets, color = "#000000", size = 12, filled = False, offset_transform = None, **kwargs):
+    """
+    Builds a single PathCollection drawing the vector outline of an icon at every offset.
+    Recoloring the icons afterwards is just a facecolor change on the collection.
+
+    Input
+        icon: str, name of the icon function.
+        offsets: (n, 2) array of icon centers in offset_transform coordinates.
+        (optional) color: hex code, or a list of hex codes with one color per offset. Default is "#000000".
+        (optional) size: float, default is 12. Height of each icon in points.
+        (optional) filled: bool, default is False. Use the filled variant of "foot" or "hand".
+        (optional) offset_transform: matplotlib transform for the offsets, e.g. ax.transData
+        kwargs: passed to PathCollection
+
+    Output
+        matplotlib PathCollection
+    """
+    paths   = icon_path(icon, filled)
+    offsets = np.atleast_2d(np.asarray(offsets, dtype = float))
+
+    colors = [color] * len(offsets) if isinstance(color, (str, Color)) else list(color)
+    if len(colors) != len(offsets):
+        raise ValueError("Number of colors should match number of points.")
+    tables = color_tables([normalize_hex(c) for c in colors]) / 255
+
+    #two tone icons draw the lighter region on top of the full outline for every offset
+    if paths.blend is not None:
+        facecolors = tables[:, [FOREGROUND, BLEND]].reshape(-1, 4)
+        path_list  = [paths.foreground, paths.blend]
+        offsets    = np.repeat(offsets, 2, axis = 0)
+    else:
+        facecolors = tables[:, FOREGROUND]
+        path_list  = [paths.foreground]
+
+    #paths are scaled to points by the collection sizes, not by the axis transform
+    return PathCollection(path_list, sizes = [size ** 2], offsets = offsets, offset_transform = offset_transform,
+                          transform = IdentityTransform(), facecolors = facecolors, edgecolors = "none", **kwargs)
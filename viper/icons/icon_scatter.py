@@ -0,0 +1,146 @@
+import numpy as np
+from matplotlib.artist import Artist, allow_rasterization
+
+from viper.ColorWheel.Color import Color
+from .get_icons import _get_icon, _icon_labels, _rule_name, normalize_hex
+from .icon_paths import icon_path_collection
+
+class IconCollection(Artist):
+    """
+    Artist that draws many copies of an icon with a single image blit.
+    Every instance is composited into one RGBA buffer at draw time, so drawing costs scale with the
+    number of pixels covered instead of the number of matplotlib artists.
+    Usually created through icon_scatter().
+    """
+    def __init__(self, icon, x, y, color = "#000000", size = 12, filled = False, **kwargs):
+        super().__init__()
+
+        self.name    = _rule_name(icon, filled)
+        self.offsets = np.column_stack([np.ravel(x), np.ravel(y)]).astype(float)
+
+        if isinstance(color, (str, Color)):
+            self.colors = [normalize_hex(color)] * len(self.offsets)
+        else:
+            self.colors = [normalize_hex(c) for c in color]
+            if len(self.colors) != len(self.offsets):
+                raise ValueError("Number of colors should match number of points.")
+
+        self.size = size
+        self.update(kwargs)
+
+    def set_offsets(self, x, y):
+        """
+        Moves the icons to new data coordinates.
+        """
+        self.offsets = np.column_stack([np.ravel(x), np.ravel(y)]).astype(float)
+        self.stale = True
+
+    def _sprites(self, height):
+        """
+        Returns a premultiplied float32 RGBA sprite of the given pixel height for every distinct color.
+        """
+        icon_height, icon_width = _icon_labels(self.name).shape
+        width = max(1, round(height * icon_width / icon_height))
+
+        sprites = {}
+        for color in set(self.colors):
+            rgba = np.asarray(_get_icon(self.name, color, (width, height)), dtype = np.float32) / 255
+            rgba[..., :3] *= rgba[..., 3:]
+            sprites[color] = rgba
+        return sprites
+
+    @allow_rasterization
+    def draw(self, renderer):
+        if not self.get_visible() or len(self.offsets) == 0:
+            return
+
+        magnification = renderer.get_image_magnification()
+        height = max(1, round(renderer.points_to_pixels(self.size) * magnification))
+        sprites = self._sprites(height)
+        h, w = next(iter(sprites.values())).shape[:2]
+
+        #sprite rectangles in image pixels of the clip area (the axes, or the whole figure when not clipping)
+        bbox = self.axes.bbox if self.get_clip_on() else self.figure.bbox
+        x0, y0 = np.floor([bbox.x0, bbox.y0])
+        area_width  = int(np.ceil((bbox.x1 - x0) * magnification))
+        area_height = int(np.ceil((bbox.y1 - y0) * magnification))
+
+        centers = (self.get_transform().transform(self.offsets) - [x0, y0]) * magnification
+        #rows count down from the top of the clip area
+        tops  = np.round(area_height - centers[:, 1] - h / 2).astype(int)
+        lefts = np.round(centers[:, 0] - w / 2).astype(int)
+
+        r0 = np.maximum(tops, 0)
+        r1 = np.minimum(tops + h, area_height)
+        c0 = np.maximum(lefts, 0)
+        c1 = np.minimum(lefts + w, area_width)
+        visible = np.flatnonzero((r0 < r1) & (c0 < c1))
+        if len(visible) == 0:
+            return
+
+        #the buffer only covers the union of the visible sprites
+        top, bottom = r0[visible].min(), r1[visible].max()
+        left, right = c0[visible].min(), c1[visible].max()
+        buffer = np.zeros((bottom - top, right - left, 4), dtype = np.float32)
+
+        for i in visible:
+            sprite = sprites[self.colors[i]]
+            src = sprite[r0[i] - tops[i]:r1[i] - tops[i], c0[i] - lefts[i]:c1[i] - lefts[i]]
+            dst = buffer[r0[i] - top:r1[i] - top, c0[i] - left:c1[i] - left]
+            dst *= 1 - src[..., 3:]
+            dst += src
+
+        #un-premultiply for the renderer
+        alpha = buffer[..., 3:]
+        np.divide(buffer[..., :3], alpha, out = buffer[..., :3], where = alpha > 0)
+        if self.get_alpha() is not None:
+            buffer[..., 3] *= self.get_alpha()
+        image = np.round(buffer[::-1] * 255).astype(np.uint8)
+
+        renderer.open_group("icon_scatter", gid = self.get_gid())
+        gc = renderer.new_gc()
+        self._set_gc_clip(gc)
+        renderer.draw_image(gc, x0 + left / magnification, y0 + (area_height - bottom) / magnification, image)
+        gc.restore()
+        renderer.close_group("icon_scatter")
+        self.stale = False
+
+def icon_scatter(ax, x, y, icon, color = "#000000", size = 12, filled = False, zorder = 2, clip_on = True, vector = False, **kwargs):
+    """
+    Places an icon at every (x, y) location on the given axis using a single artist.
+
+    Input
+        ax: matplotlib axis object to plot on.
+        x, y: array-like, data coordinates of the icon centers.
+        icon: str, name of the icon function, e.g. "walking" or "sight".
+        (optional) color: hex code, or a list of hex codes with one color per point. Default is "#000000".
+        (optional) size: float, default is 12. Height of each icon in points.
+        (optional) filled: bool, default is False. Use the filled variant of "foot" or "hand".
+        (optional) zorder: float, default is 2.
+        (optional) clip_on: bool, default is True. Clip icons to the axis.
+        (optional) vector: bool, default is False. Draw the traced vector outline of the icon instead of
+            a raster, keeping PDF/SVG output small and sharp at any zoom.
+        kwargs: additional artist properties, e.g. alpha or label.
+
+    Output
+        IconCollection artist, or a PathCollection when vector is True
+    """
+    if vector:
+        offsets = np.column_stack([np.ravel(x), np.ravel(y)]).astype(float)
+        icons = icon_path_collection(icon, offsets, color = color, size = size, filled = filled,
+                                     offset_transform = ax.transData, zorder = zorder, clip_on = clip_on, **kwargs)
+        ax.add_collection(icons, autolim = False)
+        ax.update_datalim(offsets)
+        ax.autoscale_view()
+        return icons
+
+    icons = IconCollection(icon, x, y, color = color, size = size, filled = filled,
+                           zorder = zorder, clip_on = clip_on, **kwargs)
+    icons.set_transform(ax.transData)
+    ax.add_artist(icons)
+    if clip_on:
+        icons.set_clip_path(ax.patch)
+
+    ax.update_datalim(icons.offsets)
+    ax.autoscale_view()
+    return icons
@@ -1,7 +1,20 @@
 from string import ascii_uppercase
+from contextlib import contextmanager, nullcontext
+import io
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.axes import Axes
 
+from viper.icons.get_icons import _get_icon, _rule_name, icon_size
+from viper.icons.icon_paths import icon_path_collection
+from viper.ColorWheel.accessibility import label_color
+from viper.stylesheets import get_style, style_context
+from .live import LivePanel
+from .rasterize import dense_rasterized, element_count, output_size, save_format, RasterReport, VECTOR_FORMATS
+
+#metadata that drops the creation date, so in-memory exports of the same figure are byte-identical
+reproducible_metadata = {"svg": {"Date": None}, "pdf": {"CreationDate": None}}
+
 class Figure:
     """
     Custom Figure class for creating multi-panelled figures. Constructor allows for a stylesheet to be 
@@ -10,7 +23,8 @@ class Figure:
     Inputs
         (optional) figsize: tuple(float, float), default is (6.5, 3). The size of the figure in inches (width, height).
         (optional) dpi: int, default is 150. The dpi of the created figure.
-        (optional) style: str, default is None. The given style sheet for the figure. Accepts mpl.style_sheets or a path to a style sheet
+        (optional) style: str, default is None. The given style sheet for the figure. Accepts mpl.style_sheets, a path to a style sheet
+            or a name registered in viper.stylesheets ("viper_dark", "viper_light")
         (optional) invert: bool, default is True. Invert's the y-axis of the global axis so that the origin is the upper left corner.
 
     Output
@@ -31,8 +45,11 @@ class Figure:
         if figsize is None:
             figsize = (6.5, 3)
 
+        #compiled once, panels and letters apply it by reference
+        self._style_params = get_style(style)
+
         if style is not None:
-            with plt.style.context(style):
+            with style_context(self._style_params):
                 self.figure = plt.figure(dpi = dpi, figsize = figsize)
                 self.axmain = plt.gca()
         else:
@@ -53,6 +70,7 @@ class Figure:
         if invert:
             self.axmain.invert_yaxis()
         
+        self.raster_threshold = None #see set_raster_policy
         self.letters = [] #letters for annotating figure
         self.panels  = [] #panels for figure
         
@@ -67,7 +85,7 @@ class Figure:
         Method to remove borders around all panels within the Figure.
         """
         for panel in self.panels:
-            panel.spines.set_visible(False)
+            panel.spines[:].set_visible(False)
         
     def add_letter(self, x, y, letter = None, fontsize = 9, ha = "left", va = "top", color = None, zorder = 20):
         """
@@ -81,14 +99,23 @@ class Figure:
         self.letters.append(letter_to_add)
 
         if color is None:
-            color = "white" if "dark" in self.style else "black"
+            color = self._label_color()
 
         if self.style is not None:
-            with plt.style.context(self.style):
+            with style_context(self._style_params):
                 self.axmain.text(x, y, letter_to_add, ha = ha, va = va, fontweight = "bold", color = color, fontsize = fontsize, zorder = zorder)
         else:
             self.axmain.text(x, y, letter_to_add, ha = ha, va = va, fontweight = "bold", color = color, fontsize = fontsize, zorder = zorder)
         
+    def _label_color(self):
+        """
+        Returns black or white, whichever contrasts more with the background of the figure.
+        """
+        background = self.axmain.get_facecolor()
+        if not self.axmain.patch.get_visible() or background[3] == 0:
+            background = self.figure.get_facecolor()
+        return str(label_color([background[:3]])[0])
+
     def add_panel(self, dim = None, style = None):
         """
         Method to add an individual panel to the Figure. The resulting axis is set as the current mpl axis.
@@ -104,21 +131,138 @@ class Figure:
         if dim is None:
             dim = [0.5, 0.3, 5.8, 2.3]
 
-        if self.style is not None and style is None:
-            with plt.style.context(self.style):
-                panel = self.axmain.inset_axes(dim, transform = self.axmain.transData)
-        elif style is not None:
-            with plt.style.context(style):
-                panel = self.axmain.inset_axes(dim, transform = self.axmain.transData)
-        else:
-            panel = self.axmain.inset_axes(dim, transform = self.axmain.transData)
+        if style is None:
+            style = self._style_params
+
+        with style_context(style):
+            panel = self._make_panel(dim)
 
-        self.panels.append(panel)
-        self.figure.add_axes(panel)
         plt.sca(panel)
         
         return panel
+
+    def _make_panel(self, dim):
+        """
+        Creates one panel at dim = [x, y, width, height] in inches under the active style.
+        """
+        panel = self.axmain.inset_axes(dim, transform = self.axmain.transData)
+
+        self.panels.append(panel)
+        self.figure.add_axes(panel)
+        return panel
+
+    def add_panels(self, layout, margins = (0.5, 0.3, 0.2, 0.3), gutters = (0.4, 0.4), panel_size = None, style = None):
+        """
+        Method to add a whole grid of panels in one pass. All panels are created under a single style
+        context and the last one is set as the current mpl axis.
+
+        Input
+            layout: either (nrows, ncols) for a regular grid, or an ASCII mosaic with one character per cell
+                and one line per row, e.g. "AAB\nCCB" or ["AAB", "CCB"]. Cells sharing a character form one
+                panel and have to be rectangular, "." leaves a cell empty.
+            (optional) margins: (left, top, right, bottom) in inches, default is (0.5, 0.3, 0.2, 0.3).
+            (optional) gutters: (horizontal, vertical) space between columns and between rows in inches, default is (0.4, 0.4).
+            (optional) panel_size: (width, height) of one grid cell in inches. Default is None, which fills
+                the Figure inside the margins.
+            (optional) style: str, default is the Figure style. The style sheet for the new panels.
+
+        Output
+            numpy object array of shape (nrows, ncols) holding the panels for a grid layout,
+            or a dict {character: panel} for a mosaic.
+            The panels are also appended to Figure.panels in row-major order.
+        """
+        if isinstance(layout, str):
+            layout = [line.strip() for line in layout.strip().splitlines()]
+        if isinstance(layout, tuple):
+            grid = np.arange(layout[0] * layout[1]).reshape(layout).astype(str).astype(object)
+            mosaic = False
+        else:
+            if len(set(len(row) for row in layout)) != 1:
+                raise ValueError("Every row of the mosaic needs the same number of cells.")
+            grid = np.array([list(row) for row in layout], dtype = object)
+            mosaic = True
+        nrows, ncols = grid.shape
+
+        left, top, right, bottom = margins
+        hgap, vgap = gutters
+        if panel_size is None:
+            panel_size = ((self.figsize[0] - left - right - (ncols - 1) * hgap) / ncols,
+                          (self.figsize[1] - top - bottom - (nrows - 1) * vgap) / nrows)
+        cell_width, cell_height = panel_size
+
+        #panel dimensions in inches, first cell at the top left
+        dims = {}
+        for key in dict.fromkeys(grid.ravel()):
+            if key == ".":
+                continue
+            rows, cols = np.nonzero(grid == key)
+            r0, r1, c0, c1 = rows.min(), rows.max(), cols.min(), cols.max()
+            if len(rows) != (r1 - r0 + 1) * (c1 - c0 + 1):
+                raise ValueError(f"Panel \"{key}\" of the mosaic is not rectangular.")
+
+            width  = (c1 - c0 + 1) * cell_width + (c1 - c0) * hgap
+            height = (r1 - r0 + 1) * cell_height + (r1 - r0) * vgap
+            x = left + c0 * (cell_width + hgap)
+            y = top + r0 * (cell_height + vgap)
+            if not self.axmain.yaxis_inverted():
+                y = self.figsize[1] - y - height
+            dims[key] = [x, y, width, height]
+
+        if style is None:
+            style = self._style_params
+
+        with style_context(style):
+            panels = {key: self._make_panel(dim) for key, dim in dims.items()}
+
+        if panels:
+            plt.sca(list(panels.values())[-1])
+
+        if mosaic:
+            return panels
+        return np.array([panels[key] for key in grid.ravel()], dtype = object).reshape(nrows, ncols)
     
+    def add_icon(self, icon, x, y, height, color = "#000000", filled = False, dpi = None, zorder = 20, vector = False):
+        """
+        Method to place an icon on the Figure. The icon is rendered from the smallest level of its
+        pre-computed pyramid that covers the requested physical size, so small icons are cheap to draw
+        and do not embed the full resolution image in saved files.
+
+        Input
+            icon: str, name of the icon function, e.g. "walking" or "sight".
+            x, y: float, position of the icon center in inches.
+            height: float, height of the icon in inches. The width follows the icon's aspect ratio.
+            (optional) color: str, default is "#000000". Hex code of the icon color.
+            (optional) filled: bool, default is False. Use the filled variant of "foot" or "hand".
+            (optional) dpi: float, default is the Figure dpi. Resolution to render the icon at, pass the
+                savefig dpi to keep icons sharp in saved files.
+            (optional) vector: bool, default is False. Draw the traced vector outline of the icon instead
+                of a raster. The color can then be changed later with set_facecolor().
+
+        Output
+            matplotlib AxesImage object, or a PathCollection when vector is True
+        """
+        if vector:
+            icons = icon_path_collection(icon, [(x, y)], color = color, size = height * 72, filled = filled,
+                                         offset_transform = self.axmain.transData, zorder = zorder)
+            self.axmain.add_collection(icons, autolim = False)
+            return icons
+
+        if dpi is None:
+            dpi = self.dpi
+
+        size = icon_size(icon, height, dpi, filled = filled)
+        img  = _get_icon(_rule_name(icon, filled), color, size)
+        width = height * size[0] / size[1]
+
+        #the first image row has to land at the visual top of the figure
+        if self.axmain.yaxis_inverted():
+            top, bottom = y - height / 2, y + height / 2
+        else:
+            top, bottom = y + height / 2, y - height / 2
+
+        return self.axmain.imshow(img, extent = (x - width / 2, x + width / 2, bottom, top),
+                                  aspect = "auto", zorder = zorder)
+
     def highlight_panel(self, panel, color = "red"):
         """
         Method to highlight an individual panel by coloring its axis.
@@ -148,17 +292,158 @@ class Figure:
         for ax in self.panels:
             ax.patch.set_alpha(0)
 
-    def savefig(self, path, dpi = 300, transparent = False, **kwargs):
+    def clear_panels(self, panels = None):
         """
-        Method to safe the figure in a desired format. 
+        Method to remove the plotted data from panels while keeping the layout, letters, labels,
+        limits and styling, so the Figure can be reused for another dataset.
 
         Input
-            path: str or path-like object, The file path to save the Figure.
-            dpi: int, default is 300. The dpi of the image.
-            transparent: bool, default is False. Option to turn the figure transparent.
-            kwargs: optional arguments passed to plt.savefig()
+            (optional) panels: list of panels (or their indices in Figure.panels), default is every panel.
         """
+        if panels is None:
+            panels = self.panels
+
+        with style_context(self._style_params):
+            for panel in panels:
+                if isinstance(panel, int):
+                    panel = self.panels[panel]
+
+                for artist in [*panel.lines, *panel.collections, *panel.patches, *panel.images,
+                               *panel.texts, *panel.tables, *panel.artists]:
+                    artist.remove()
+                panel.containers.clear()
+                if panel.legend_ is not None:
+                    panel.legend_.remove()
+
+                #next plot starts the color cycle over
+                panel.set_prop_cycle(None)
+                panel.relim()
+                panel.autoscale_view()
+
+    def live_panel(self, panel, artists = None):
+        """
+        Method to switch a panel to live updating. Updates through the returned handle only redraw the
+        changing artists of that panel (blitting), the rest of the Figure is drawn once and cached.
+
+        Input
+            panel: mpl.Axis or int index into Figure.panels
+            (optional) artists: list of the artists that change, default is every line, collection and image in the panel.
+
+        Output
+            LivePanel, call .update(...) with one data entry per artist, e.g. live.update(y) or live.update((x, y), offsets)
+        """
+        if isinstance(panel, int):
+            panel = self.panels[panel]
+        if artists is None:
+            artists = [*panel.lines, *panel.collections, *panel.images]
+        return LivePanel(panel, artists)
+
+    def close(self):
+        """
+        Method to close the Figure and release it from pyplot.
+        """
+        plt.close(self.figure)
+
+    def set_raster_policy(self, threshold = 5000):
+        """
+        Method to set the rasterization policy used by savefig for vector formats (pdf, svg, eps, ps).
+        Collections and lines with more than threshold elements (markers, paths or vertices) are saved
+        as images at the save dpi, axes, text and annotations stay vectors.
+
+        Input
+            threshold: int, default is 5000. None turns the policy off.
+        """
+        self.raster_threshold = threshold
+
+    @contextmanager
+    def _saving(self, transparent = False):
+        """
+        Hides the figure borders (and makes the Figure transparent) while saving, then puts everything back.
+        """
+        axison  = self.axmain.axison
+        patches = [self.figure.patch, self.axmain.patch, *[ax.patch for ax in self.panels]]
+        alphas  = [patch.get_alpha() for patch in patches]
+
         self.remove_figure_borders()
         if transparent:
             self.make_transparent()
-        self.figure.savefig(path, dpi = dpi, **kwargs)
+        try:
+            yield
+        finally:
+            if axison:
+                self.axmain.axis("on")
+            for patch, alpha in zip(patches, alphas):
+                patch.set_alpha(alpha)
+
+    def savefig(self, path, dpi = 300, transparent = False, rasterize = None, report = False, **kwargs):
+        """
+        Method to safe the figure in a desired format. The figure borders are only hidden while saving,
+        the Figure itself is left unchanged.
+
+        Input
+            path: str or path-like object, The file path to save the Figure. File objects (e.g. io.BytesIO) work too,
+                pass the format as a keyword then.
+            dpi: int, default is 300. The dpi of the image.
+            transparent: bool, default is False. Option to turn the figure transparent.
+            rasterize: int or False, default is None. Element threshold for rasterizing dense artists in
+                vector output, overrides the policy from set_raster_policy. False saves everything as vectors.
+            report: bool, default is False. Also renders the figure without rasterization to measure the savings.
+            kwargs: optional arguments passed to plt.savefig()
+
+        Output
+            None, or RasterReport(artists, elements, size, vector_size) if report is True:
+            the number of rasterized artists and their elements, the size of the saved file and the size
+            it would have had with everything as vectors, in bytes.
+        """
+        threshold = self.raster_threshold if rasterize is None else rasterize
+        fmt = save_format(path, kwargs)
+        if threshold is False or threshold is None or fmt not in VECTOR_FORMATS:
+            threshold = None
+
+        with self._saving(transparent):
+            vector_size = None
+            if report:
+                buffer = io.BytesIO()
+                self.figure.savefig(buffer, dpi = dpi, **{**kwargs, "format": fmt or None})
+                vector_size = buffer.tell()
+
+            start = path.tell() if hasattr(path, "tell") else 0
+            if threshold is None:
+                self.figure.savefig(path, dpi = dpi, **kwargs)
+                artists = []
+            else:
+                with dense_rasterized(self.figure, threshold) as artists:
+                    self.figure.savefig(path, dpi = dpi, **kwargs)
+
+        if report:
+            return RasterReport(len(artists), sum(element_count(artist) for artist in artists),
+                                output_size(path, start), vector_size)
+
+    def to_bytes(self, format = "png", dpi = 300, transparent = False, view = False, **kwargs):
+        """
+        Method to export the figure in memory, without writing a file.
+
+        Input
+            format: str, default is "png". Any format savefig supports, e.g. "svg" or "pdf".
+            dpi: int, default is 300. The dpi of the image.
+            transparent: bool, default is False. Option to turn the figure transparent.
+            view: bool, default is False. Return a memoryview of the buffer instead of copying it into bytes.
+            kwargs: optional arguments passed to savefig(), e.g. rasterize. SVG and PDF leave out the creation
+                date unless it is given in metadata and SVG ids get a fixed salt unless rcParams["svg.hashsalt"]
+                is set, so the same figure always gives the same bytes.
+
+        Output
+            bytes, or memoryview if view is True
+        """
+        if format in reproducible_metadata:
+            kwargs["metadata"] = {**reproducible_metadata[format], **(kwargs.get("metadata") or {})}
+
+        #svg ids are salted with a random uuid by default
+        fixed_salt = format == "svg" and plt.rcParams["svg.hashsalt"] is None
+
+        buffer = io.BytesIO()
+        with plt.rc_context({"svg.hashsalt": "viper"}) if fixed_salt else nullcontext():
+            self.savefig(buffer, dpi = dpi, transparent = transparent, format = format, **kwargs)
+        if view:
+            return buffer.getbuffer()
+        return buffer.getvalue()
@@ -1,4 +1,7 @@
-
 from .boxplot import boxplot
 from.Figure import Figure
-from .pairplot import pairplot
\ No newline at end of file
+from .pairplot import pairplot
+from .export import export_figures
+from .figure_pool import FigureTemplate, FigurePool
+from .multipage import MultiPageWriter
+from .spec import render_spec, render_figure, spec_key
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Batch export of many figures in a pool of worker processes.
+
+Each task is a picklable callable (a module level function, functools.partial, ...) that builds and returns
+a viper.Figure or matplotlib Figure. Workers render with the Agg backend, save the figure and close it,
+so only small result records travel back to the parent.
+"""
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+import itertools
+import os
+import time
+import traceback
+
+ExportResult = namedtuple("ExportResult", ["index", "path", "ok", "error", "seconds"])
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+def _render(builder, path, dpi, savefig_kwargs):
+    """
+    Runs in a worker: builds one figure, saves it and closes it. Errors are returned as text so
+    one failing figure never takes down the batch.
+    """
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    fig = None
+    try:
+        fig = builder()
+        fig.savefig(path, dpi = dpi, **savefig_kwargs)
+        return None, time.perf_counter() - start
+    except Exception:
+        return traceback.format_exc(), time.perf_counter() - start
+    finally:
+        if fig is not None:
+            plt.close(getattr(fig, "figure", fig))
+
+def export_figures(builders, paths, dpi = 300, max_workers = None, max_pending = None, progress = None,
+                   max_tasks_per_child = None, **savefig_kwargs):
+    """
+    Renders and saves many figures in parallel, yielding one ExportResult per figure as soon as it is done.
+
+    Input
+        builders: iterable of picklable callables, each returning a viper.Figure or matplotlib Figure.
+        paths: iterable of output paths, one per builder.
+        (optional) dpi: int, default is 300.
+        (optional) max_workers: int, default is the number of CPUs.
+        (optional) max_pending: int, default is 2 * max_workers. At most this many figures are queued at once,
+            so builders and paths can be long lazy iterables without filling the parent's memory.
+        (optional) progress: callable, called as progress(done, total, result) after every figure. total is None
+            if builders has no length.
+        (optional) max_tasks_per_child: int, default is None. Restart workers after this many figures to
+            release memory (Python 3.11+).
+        kwargs: passed to savefig
+
+    Output
+        generator of ExportResult(index, path, ok, error, seconds) in completion order. error holds the
+        formatted traceback of failed figures and is None otherwise. Figures that were in flight when a
+        worker process crashed are rendered again one at a time in a single worker, so only the figure
+        that crashes is reported as failed.
+
+    Example
+        results = list(export_figures([partial(make_figure, s) for s in subjects], [f"{s}.png" for s in subjects]))
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = 2 * max_workers
+
+    try:
+        total = len(builders)
+    except TypeError:
+        total = None
+
+    pool_kwargs = {"max_workers": max_workers, "initializer": _init_worker}
+    if max_tasks_per_child is not None:
+        pool_kwargs["max_tasks_per_child"] = max_tasks_per_child
+
+    tasks = enumerate(zip(builders, paths))
+    pools = [ProcessPoolExecutor(**pool_kwargs)]
+    solo = []
+    pending = {}
+
+    def submit(index, builder, path):
+        try:
+            future = pools[-1].submit(_render, builder, path, dpi, savefig_kwargs)
+        except BrokenProcessPool: #a worker died, later figures go to a fresh pool
+            pools[-1].shutdown(wait = False)
+            pools.append(ProcessPoolExecutor(**pool_kwargs))
+            future = pools[-1].submit(_render, builder, path, dpi, savefig_kwargs)
+        pending[future] = (index, builder, path)
+
+    def render_alone(builder, path):
+        #single worker pool, so a crash here can only come from this figure
+        if not solo:
+            solo.append(ProcessPoolExecutor(**dict(pool_kwargs, max_workers = 1)))
+        try:
+            return solo[0].submit(_render, builder, path, dpi, savefig_kwargs).result()
+        except BrokenProcessPool:
+            solo.pop().shutdown(wait = False)
+            return traceback.format_exc(), 0.0
+        except Exception:
+            return traceback.format_exc(), 0.0
+
+    done = 0
+    try:
+        for index, (builder, path) in itertools.islice(tasks, max_pending):
+            submit(index, builder, path)
+
+        while pending:
+            finished, _ = wait(pending, return_when = FIRST_COMPLETED)
+            for future in finished:
+                index, builder, path = pending.pop(future)
+                try:
+                    error, seconds = future.result()
+                except BrokenProcessPool:
+                    #a crashing worker takes every figure in flight down with it, rerun each one on its own
+                    #so only the figure that crashes fails
+                    error, seconds = render_alone(builder, path)
+                except Exception: #the builder could not be sent to the worker
+                    error, seconds = traceback.format_exc(), 0.0
+
+                result = ExportResult(index, path, error is None, error, seconds)
+                done += 1
+                if progress is not None:
+                    progress(done, total, result)
+                yield result
+
+                #refill the window
+                for index, (builder, path) in itertools.islice(tasks, 1):
+                    submit(index, builder, path)
+    finally:
+        for pool in pools + solo:
+            pool.shutdown(wait = True, cancel_futures = True)
@@ -0,0 +1,106 @@
+"""
+Reusable figure layouts for long running jobs.
+
+A FigureTemplate builds a viper.Figure layout (panels, letters, style) from a layout function. A FigurePool
+keeps at most size of these figures alive and hands them out again with their panels cleared, so a job
+plotting thousands of datasets pays for the layout once and never grows pyplot's figure registry.
+"""
+from contextlib import contextmanager
+
+from .Figure import Figure
+
+class FigureTemplate:
+    """
+    Recipe for a Figure layout.
+
+    Input
+        layout: callable taking the new Figure, e.g. lambda fig: fig.add_panels((2, 3)).
+            Everything it adds to the Figure is kept when the figure is reused, only data in the panels is cleared.
+        figure kwargs: figsize, dpi, style and invert, passed to viper.Figure
+    """
+    def __init__(self, layout, figsize = None, dpi = 150, style = None, invert = True):
+        self.layout = layout
+        self.figure_kwargs = {"figsize": figsize, "dpi": dpi, "style": style, "invert": invert}
+
+    def build(self):
+        """
+        Creates a new Figure with the template layout.
+        """
+        fig = Figure(**self.figure_kwargs)
+        self.layout(fig)
+        return fig
+
+class FigurePool:
+    """
+    Bounded pool of Figures built from one FigureTemplate.
+
+    Input
+        template: FigureTemplate
+        (optional) size: int, default is 1. Maximum number of live figures.
+
+    Use
+        with FigurePool(template) as pool:
+            for data in datasets:
+                with pool.figure() as fig:
+                    fig.panels[0].plot(data)
+                    fig.savefig(...)
+    All figures are closed when the pool is closed.
+    """
+    def __init__(self, template, size = 1):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self.template = template
+        self.size = size
+        self._idle = []
+        self._busy = []
+
+    def acquire(self):
+        """
+        Returns a Figure with empty panels, reusing a released one when possible.
+        Raises RuntimeError if all size figures are in use.
+        """
+        if self._idle:
+            fig = self._idle.pop()
+            fig.clear_panels()
+        elif len(self._busy) < self.size:
+            fig = self.template.build()
+        else:
+            raise RuntimeError(f"All {self.size} figures of the pool are in use, release one first.")
+        self._busy.append(fig)
+        return fig
+
+    def release(self, fig):
+        """
+        Returns a Figure to the pool for reuse.
+        """
+        self._busy.remove(fig)
+        self._idle.append(fig)
+
+    @contextmanager
+    def figure(self):
+        """
+        Context manager acquiring a Figure and releasing it afterwards.
+        """
+        fig = self.acquire()
+        try:
+            yield fig
+        finally:
+            self.release(fig)
+
+    def close(self):
+        """
+        Closes every figure of the pool.
+        """
+        for fig in self._idle + self._busy:
+            fig.close()
+        self._idle.clear()
+        self._busy.clear()
+
+    def __len__(self):
+        return len(self._idle) + len(self._busy)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
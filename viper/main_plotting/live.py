@@ -0,0 +1,114 @@
+"""
+Blitting based live updates for single panels of a viper.Figure.
+
+A LivePanel keeps a copy of its panel's pixels without the changing artists. Every update restores that copy,
+draws only the changing artists and blits the panel, so other panels, letters and the figure frame are never
+redrawn. The copy is grabbed again after every full redraw of the canvas (e.g. after resizing).
+Canvases that can not blit (Agg, inline notebook figures) fall back to a normal idle redraw.
+"""
+import numpy as np
+from matplotlib.backend_bases import FigureCanvasBase
+from matplotlib.collections import Collection
+from matplotlib.image import AxesImage
+from matplotlib.lines import Line2D
+from matplotlib.text import Text
+
+def _set_data(artist, data):
+    """
+    Hands new data to an artist: (x, y) or y for lines, (n, 2) offsets for collections, an array for
+    images and a string for texts.
+    """
+    if isinstance(artist, Line2D):
+        if isinstance(data, tuple) and len(data) == 2:
+            artist.set_data(*data)
+        else:
+            artist.set_data(np.arange(len(data)), data)
+    elif isinstance(artist, Collection):
+        artist.set_offsets(data)
+    elif isinstance(artist, AxesImage):
+        artist.set_data(data)
+    elif isinstance(artist, Text):
+        artist.set_text(data)
+    else:
+        raise TypeError(f"Can not update {type(artist).__name__} artists, update it yourself and pass None.")
+
+def _can_blit(canvas):
+    """
+    True if the canvas copies regions and shows blitted pixels. Agg can copy regions but its blit does nothing.
+    """
+    return bool(getattr(canvas, "supports_blit", False)) and type(canvas).blit is not FigureCanvasBase.blit
+
+class LivePanel:
+    """
+    Fast update handle for one panel, usually created with Figure.live_panel().
+
+    Input
+        panel: matplotlib Axes
+        artists: list of the artists in panel that change between updates
+
+    Use
+        live = fig.live_panel(ax, [line, scatter])
+        live.update(y, offsets)       #one entry per artist, None leaves an artist as it is
+        live.close()                  #back to normal drawing
+    """
+    def __init__(self, panel, artists):
+        self.panel = panel
+        self.artists = list(artists)
+        self.canvas = panel.figure.canvas
+        self._background = None
+        self._blit = _can_blit(self.canvas)
+
+        #without blitting the artists stay in normal draws, updates just request a redraw
+        for artist in self.artists:
+            artist.set_animated(self._blit)
+        self._draw_id = self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        if not self._blit:
+            return
+        #animated artists are left out of full draws, grab the clean panel and put them back on top
+        self._background = self.canvas.copy_from_bbox(self.panel.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            self.panel.draw_artist(artist)
+
+    def update(self, *data):
+        """
+        Sets new data on the live artists (one entry per artist, in order; None skips one) and redraws
+        only this panel.
+        """
+        if len(data) > len(self.artists):
+            raise ValueError(f"Got data for {len(data)} artists, the panel has {len(self.artists)} live artists.")
+        for artist, values in zip(self.artists, data):
+            if values is not None:
+                _set_data(artist, values)
+        self.blit()
+
+    def blit(self):
+        """
+        Redraws the live artists of the panel over its cached background.
+        """
+        if not self._blit:
+            self.canvas.draw_idle()
+            return
+
+        if self._background is None:
+            #first update, a full draw fills the background through the draw event
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_artists()
+        self.canvas.blit(self.panel.bbox)
+        self.canvas.flush_events()
+
+    def close(self):
+        """
+        Stops live updating and returns the artists to normal drawing.
+        """
+        self.canvas.mpl_disconnect(self._draw_id)
+        for artist in self.artists:
+            artist.set_animated(False)
+        self._background = None
+        self.canvas.draw_idle()
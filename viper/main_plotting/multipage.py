@@ -0,0 +1,71 @@
+"""
+Streaming multi-page PDF export. Figures are written one page at a time and closed right away, so a
+report with hundreds of pages never holds more than one figure open.
+"""
+from contextlib import nullcontext
+
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+
+from .Figure import Figure, reproducible_metadata
+from .rasterize import dense_rasterized
+
+class MultiPageWriter:
+    """
+    Appends Figures to one multi-page PDF.
+
+    Input
+        path: str or path-like object, the PDF file to write.
+        (optional) dpi: int, default is 300. Resolution of rasterized content.
+        (optional) transparent: bool, default is False.
+        (optional) close: bool, default is True. Close every figure after its page is written.
+        (optional) metadata: dict of PDF metadata, e.g. {"Title": "Report"}. The creation date is left out
+            unless given here, so the same figures always give the same file.
+        kwargs: passed to savefig for every page. rasterize also applies to matplotlib Figures.
+
+    Use
+        with MultiPageWriter("report.pdf") as pdf:
+            for subject in subjects:
+                pdf.add(make_figure(subject))
+    """
+    def __init__(self, path, dpi = 300, transparent = False, close = True, metadata = None, **kwargs):
+        self.path = path
+        self.dpi = dpi
+        self.transparent = transparent
+        self.close_figures = close
+        self.savefig_kwargs = kwargs
+        self.pages = 0
+        self._pdf = PdfPages(path, metadata = {**reproducible_metadata["pdf"], **(metadata or {})})
+
+    def add(self, fig):
+        """
+        Writes a viper.Figure or matplotlib Figure as the next page, then closes it unless close is False.
+        """
+        if self._pdf is None:
+            raise ValueError("The writer is already closed.")
+
+        if isinstance(fig, Figure):
+            fig.savefig(self._pdf, dpi = self.dpi, transparent = self.transparent, format = "pdf", **self.savefig_kwargs)
+        else:
+            kwargs = dict(self.savefig_kwargs)
+            threshold = kwargs.pop("rasterize", None)
+            with dense_rasterized(fig, threshold) if threshold else nullcontext():
+                fig.savefig(self._pdf, dpi = self.dpi, transparent = self.transparent, format = "pdf", **kwargs)
+        self.pages += 1
+
+        if self.close_figures:
+            plt.close(fig.figure if isinstance(fig, Figure) else fig)
+
+    def close(self):
+        """
+        Finishes the PDF file.
+        """
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,72 @@
+"""
+Save-time rasterization of dense artists.
+
+Vector files store every marker and vertex, so scatters and jitter plots with 10^5+ points produce huge
+PDF/SVG files. dense_rasterized() temporarily marks the collections and lines holding more than a threshold
+of elements as rasterized, so they are embedded as images at the save dpi while axes, text and annotations
+stay vectors.
+"""
+from collections import namedtuple
+from contextlib import contextmanager
+import os
+
+from matplotlib.collections import Collection
+from matplotlib.lines import Line2D
+
+VECTOR_FORMATS = {"pdf", "svg", "svgz", "eps", "ps"}
+
+RasterReport = namedtuple("RasterReport", ["artists", "elements", "size", "vector_size"])
+
+def element_count(artist):
+    """
+    Number of markers, paths or vertices an artist writes into a vector file.
+    """
+    if isinstance(artist, Collection):
+        return max(len(artist.get_offsets()), len(artist.get_paths()))
+    if isinstance(artist, Line2D):
+        return len(artist.get_xdata(orig = False))
+    return 0
+
+def dense_artists(figure, threshold):
+    """
+    Returns the collections and lines of figure holding more than threshold elements that are not
+    rasterized yet.
+    """
+    artists = figure.findobj(lambda artist: isinstance(artist, (Collection, Line2D)) and not artist.get_rasterized()
+                                            and element_count(artist) > threshold)
+    #panels are children of both the figure and the main axis, so findobj can visit them twice
+    return list({id(artist): artist for artist in artists}.values())
+
+@contextmanager
+def dense_rasterized(figure, threshold):
+    """
+    Context manager rasterizing every dense artist of figure and restoring them afterwards.
+    Yields the list of rasterized artists.
+    """
+    artists = dense_artists(figure, threshold)
+    for artist in artists:
+        artist.set_rasterized(True)
+    try:
+        yield artists
+    finally:
+        for artist in artists:
+            artist.set_rasterized(False)
+
+def save_format(path, kwargs):
+    """
+    The file format savefig is going to write, from the format keyword or the file extension.
+    """
+    fmt = kwargs.get("format")
+    if fmt is None and isinstance(path, (str, os.PathLike)):
+        fmt = os.path.splitext(os.fspath(path))[1].lstrip(".")
+    return (fmt or "").lower()
+
+def output_size(path, start = 0):
+    """
+    Size in bytes of what savefig wrote to a path or file object, None if it can not be told.
+    """
+    if isinstance(path, (str, os.PathLike)):
+        return os.path.getsize(path)
+    if hasattr(path, "tell"):
+        return path.tell() - start
+    return None
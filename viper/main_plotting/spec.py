@@ -0,0 +1,185 @@
+"""
+Declarative figure specs with a content-addressed render cache.
+
+A spec is a JSON-compatible dict describing a viper.Figure. Arrays are not stored in the spec, they are
+referenced as {"$data": name} and passed separately:
+
+    spec = {
+        "figure":  {"figsize": [6.5, 3], "style": "viper_light"},
+        "layout":  {"layout": "AB"},                                  #Figure.add_panels arguments
+        "panels":  [{"dim": [0.5, 0.3, 2, 2]}],                       #Figure.add_panel arguments
+        "plots":   [{"panel": "A", "fn": "boxplot", "args": [1, {"$data": "control"}], "kwargs": {"jitter_data": True}},
+                    {"panel": "A", "fn": "set_ylabel", "args": ["Error (cm)"]}],
+        "letters": [{"x": 0.1, "y": 0.1}],                            #Figure.add_letter arguments
+        "seed": 0,
+    }
+    render_spec(spec, {"control": control}, "figure.png")
+
+"fn" is one of boxplot, jitter_array, stat_annotation and legend (called with the panel as first argument) or
+any public method of the panel. "panel" is an index into Figure.panels or a key of the mosaic layout.
+A spec with a "pairplot" entry ({"args": [...], "kwargs": {...}}) renders viper.pairplot instead.
+
+Rendered files are cached under a sha256 of the canonical spec JSON, the referenced arrays, the output
+options and the viper version, so rendering an unchanged spec again only copies the cached file.
+"""
+from collections import namedtuple
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+import viper
+from .boxplot import boxplot
+from .Figure import Figure
+from .pairplot import pairplot
+from viper.plot_annotations import jitter_array, legend, stat_annotation
+
+cache_path = os.path.join(os.path.expanduser("~"), ".cache", "viper", "figures")
+
+_plot_functions = {"boxplot": boxplot, "jitter_array": jitter_array, "stat_annotation": stat_annotation, "legend": legend}
+
+RenderResult = namedtuple("RenderResult", ["key", "path", "cached"])
+
+def _data_names(value, names):
+    """
+    Collects the names of every {"$data": name} reference in a spec.
+    """
+    if isinstance(value, dict):
+        if "$data" in value:
+            names.add(value["$data"])
+        else:
+            for item in value.values():
+                _data_names(item, names)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _data_names(item, names)
+    return names
+
+def _resolve(value, data):
+    """
+    Replaces every {"$data": name} reference with data[name].
+    """
+    if isinstance(value, dict):
+        if "$data" in value:
+            name = value["$data"]
+            if name not in data:
+                raise KeyError(f"Spec references data \"{name}\" that was not passed in.")
+            return data[name]
+        return {key: _resolve(item, data) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_resolve(item, data) for item in value]
+    return value
+
+def spec_key(spec, data = None, **options):
+    """
+    Returns the cache key of a spec: sha256 of its canonical JSON, every referenced array (dtype, shape
+    and bytes), the render options and viper.__version__.
+    """
+    data = data or {}
+    digest = hashlib.sha256()
+    digest.update(json.dumps(spec, sort_keys = True, separators = (",", ":")).encode("utf-8"))
+    digest.update(json.dumps(options, sort_keys = True, separators = (",", ":")).encode("utf-8"))
+    digest.update(viper.__version__.encode("utf-8"))
+
+    for name in sorted(_data_names(spec, set())):
+        if name not in data:
+            raise KeyError(f"Spec references data \"{name}\" that was not passed in.")
+        array = np.ascontiguousarray(data[name])
+        digest.update(json.dumps([name, array.dtype.str, array.shape]).encode("utf-8"))
+        digest.update(array.tobytes() if array.dtype != object else repr(array.tolist()).encode("utf-8"))
+    return digest.hexdigest()
+
+def render_figure(spec, data = None):
+    """
+    Builds the figure a spec describes, without caching.
+    Output: viper.Figure, or a matplotlib Figure for pairplot specs
+    """
+    data = data or {}
+    if "seed" in spec:
+        np.random.seed(spec["seed"])
+
+    if "pairplot" in spec:
+        entry = spec["pairplot"]
+        fig, ax = pairplot(*_resolve(entry.get("args", []), data), **_resolve(entry.get("kwargs", {}), data))
+        return fig
+
+    fig = Figure(**spec.get("figure", {}))
+    named = {}
+    if "layout" in spec:
+        layout = dict(spec["layout"])
+        if isinstance(layout["layout"], list) and all(isinstance(x, int) for x in layout["layout"]):
+            layout["layout"] = tuple(layout["layout"])
+        panels = fig.add_panels(**layout)
+        if isinstance(panels, dict):
+            named = panels
+    for entry in spec.get("panels", []):
+        fig.add_panel(**entry)
+
+    for entry in spec.get("plots", []):
+        panel = entry.get("panel", -1)
+        ax = named[panel] if isinstance(panel, str) else fig.panels[panel]
+
+        name = entry["fn"]
+        if name in _plot_functions:
+            function = lambda *args, **kwargs: _plot_functions[name](ax, *args, **kwargs)
+        elif not name.startswith("_") and callable(getattr(ax, name, None)):
+            function = getattr(ax, name)
+        else:
+            raise ValueError(f"Unsupported plot function \"{name}\"")
+        function(*_resolve(entry.get("args", []), data), **_resolve(entry.get("kwargs", {}), data))
+
+    for entry in spec.get("letters", []):
+        fig.add_letter(**entry)
+    return fig
+
+def render_spec(spec, data = None, path = None, format = None, dpi = 300, cache_dir = None, **kwargs):
+    """
+    Renders a spec to a file, skipping the render when the cache already holds the same figure.
+
+    Input
+        spec: dict, see the module docstring.
+        (optional) data: dict {name: array} for the {"$data": name} references of the spec.
+        (optional) path: str, output file. Default is None, which leaves the file in the cache only.
+        (optional) format: str, default is the extension of path, or "png".
+        (optional) dpi: int, default is 300.
+        (optional) cache_dir: str, default is ~/.cache/viper/figures.
+        kwargs: passed to savefig
+
+    Output
+        RenderResult(key, path, cached): the cache key, the path of the rendered file and whether it came from the cache.
+    """
+    if format is None:
+        format = os.path.splitext(path)[1].lstrip(".").lower() if path is not None else ""
+        format = format or "png"
+    if cache_dir is None:
+        cache_dir = cache_path
+
+    key = spec_key(spec, data, format = format, dpi = dpi, savefig = kwargs)
+    cached_file = os.path.join(cache_dir, f"{key}.{format}")
+
+    cached = os.path.isfile(cached_file)
+    if not cached:
+        fig = render_figure(spec, data)
+        try:
+            os.makedirs(cache_dir, exist_ok = True)
+            #write next to the final name and swap it in, so readers never see a half written file
+            handle, tmp_file = tempfile.mkstemp(dir = cache_dir, suffix = "." + format)
+            try:
+                with os.fdopen(handle, "wb") as file:
+                    fig.savefig(file, dpi = dpi, format = format, **kwargs)
+                os.replace(tmp_file, cached_file)
+            except BaseException:
+                if os.path.exists(tmp_file):
+                    os.remove(tmp_file)
+                raise
+        finally:
+            plt.close(fig.figure if isinstance(fig, Figure) else fig)
+
+    if path is None:
+        return RenderResult(key, cached_file, cached)
+    shutil.copyfile(cached_file, path)
+    return RenderResult(key, path, cached)
@@ -1,6 +1,106 @@
 import os
+from contextlib import contextmanager
+from types import MappingProxyType
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
 
 head, tail = os.path.split(os.path.dirname(os.path.abspath(__file__)))
 
 viper_dark = os.path.join(head, "StyleSheets", "viper_dark.mplstyle")
 viper_light = os.path.join(head, "StyleSheets", "viper_light.mplstyle")
+
+#rcParams that style sheets are not allowed to change, same as matplotlib.style
+_style_blacklist = {
+    "interactive", "backend", "webagg.port", "webagg.address", "webagg.port_retries",
+    "webagg.open_in_browser", "backend_fallback", "toolbar", "timezone", "figure.max_open_warning",
+    "figure.raise_window", "savefig.directory", "tk.window_focus", "docstring.hardcopy", "date.epoch"}
+
+#writes a value that was already validated when the style was compiled
+_set_rc = getattr(type(mpl.rcParams), "_set", dict.__setitem__)
+
+#style name -> path of a registered style sheet
+styles = {"viper_dark": viper_dark, "viper_light": viper_light}
+
+#compiled styles, name or absolute path -> (modification time, read-only rcParams)
+_compiled = {}
+
+_empty = MappingProxyType({})
+
+def _compile(params):
+    """
+    Validates a mapping of rcParams once and freezes it.
+    """
+    params = {key: value for key, value in params.items() if key not in _style_blacklist}
+    return MappingProxyType(dict(mpl.RcParams(params)))
+
+def _compile_file(path):
+    path  = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime_ns
+
+    cached = _compiled.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, _compile(mpl.rc_params_from_file(path, use_default_template = False)))
+        _compiled[path] = cached
+    return cached[1]
+
+def register_style(name, style):
+    """
+    Registers a style under a name so it can be passed to viper.Figure and style_context by name.
+    style: path to a .mplstyle file, or a dict of rcParams
+    """
+    if isinstance(style, (str, os.PathLike)):
+        styles[name] = os.fspath(style)
+    else:
+        _compiled[name] = (None, _compile(style))
+        styles.pop(name, None)
+
+def get_style(style):
+    """
+    Returns the read-only rcParams of a style. Style sheets are parsed and validated once and
+    only re-read after the file changes.
+    style: None, a registered or matplotlib style name, a path to a .mplstyle file, a dict of
+        rcParams, or a list of these (later entries win)
+    """
+    if style is None:
+        return _empty
+    if isinstance(style, MappingProxyType):
+        return style
+    if isinstance(style, dict):
+        return _compile(style)
+    if isinstance(style, (list, tuple)):
+        params = {}
+        for entry in style:
+            params.update(get_style(entry))
+        return MappingProxyType(params)
+
+    style = os.fspath(style)
+    if style in styles:
+        return _compile_file(styles[style])
+    if style in _compiled and _compiled[style][0] is None:
+        return _compiled[style][1]
+    if style == "default" or style in plt.style.library:
+        cached = _compiled.get(style)
+        if cached is None:
+            cached = (None, _compile(mpl.rcParamsDefault if style == "default" else plt.style.library[style]))
+            _compiled[style] = cached
+        return cached[1]
+    if os.path.isfile(style):
+        return _compile_file(style)
+    raise ValueError(f"\"{style}\" is not a registered style, a matplotlib style or a style sheet path")
+
+@contextmanager
+def style_context(style):
+    """
+    Context manager applying a style like plt.style.context, but only the rcParams the style sets are
+    swapped in and restored afterwards, without validating them again.
+    """
+    params = get_style(style)
+    saved = {key: dict.__getitem__(mpl.rcParams, key) for key in params}
+    try:
+        for key, value in params.items():
+            _set_rc(mpl.rcParams, key, value)
+        yield params
+    finally:
+        for key, value in saved.items():
+            _set_rc(mpl.rcParams, key, value)